@@ -1,31 +1,48 @@
 from __future__ import annotations
 
-from openai import OpenAI
+from functools import lru_cache
+from typing import AsyncIterator
+
+from openai import AsyncOpenAI, OpenAI
 
 from app.config import get_settings
 
 
-def generate_answer(query: str, contexts: list[dict]) -> dict:
+@lru_cache(maxsize=1)
+def _client() -> OpenAI:
     settings = get_settings()
-    client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
+    return OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
 
-    context_blocks = []
-    for i, ctx in enumerate(contexts, start=1):
-        source = ctx.get("source_path", "unknown")
-        page = ctx.get("page", 0)
-        text = ctx.get("text", "")
-        context_blocks.append(f"[{i}] Source: {source} | Page: {page}\n{text}")
-
-    system_prompt = (
-        "You are a helpful assistant. Answer in concise Chinese. "
-        "Use the provided sources to answer. If sources are insufficient, say so. "
-        "Cite sources using [1], [2], etc." 
+
+@lru_cache(maxsize=1)
+def _async_client() -> AsyncOpenAI:
+    settings = get_settings()
+    return AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
+
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant. Answer in concise Chinese. "
+    "Use the provided sources to answer. If sources are insufficient, say so. "
+    "Cite sources using [1], [2], etc."
+)
+
+
+def _build_messages(query: str, contexts: list[dict]) -> list[dict]:
+    sources = "\n\n".join(
+        f"[{i}] Source: {ctx.get('source_path', 'unknown')} | Page: {ctx.get('page', 0)}\n{ctx.get('text', '')}"
+        for i, ctx in enumerate(contexts, start=1)
     )
-    user_prompt = f"Question: {query}\n\nSources:\n" + "\n\n".join(context_blocks)
+    user_prompt = f"Question: {query}\n\nSources:\n{sources}"
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}]
+
+
+def generate_answer(query: str, contexts: list[dict]) -> dict:
+    settings = get_settings()
+    client = _client()
 
     resp = client.chat.completions.create(
         model=settings.openai_chat_model,
-        messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+        messages=_build_messages(query, contexts),
         temperature=0.2,
     )
     answer = resp.choices[0].message.content or ""
@@ -44,32 +61,18 @@ def generate_answer(query: str, contexts: list[dict]) -> dict:
     return {"answer": answer, "citations": citations}
 
 
-def stream_answer(query: str, contexts: list[dict]):
+async def stream_answer(query: str, contexts: list[dict]) -> AsyncIterator[str]:
     settings = get_settings()
-    client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
-
-    context_blocks = []
-    for i, ctx in enumerate(contexts, start=1):
-        source = ctx.get("source_path", "unknown")
-        page = ctx.get("page", 0)
-        text = ctx.get("text", "")
-        context_blocks.append(f"[{i}] Source: {source} | Page: {page}\n{text}")
-
-    system_prompt = (
-        "You are a helpful assistant. Answer in concise Chinese. "
-        "Use the provided sources to answer. If sources are insufficient, say so. "
-        "Cite sources using [1], [2], etc."
-    )
-    user_prompt = f"Question: {query}\n\nSources:\n" + "\n\n".join(context_blocks)
+    client = _async_client()
 
-    stream = client.chat.completions.create(
+    stream = await client.chat.completions.create(
         model=settings.openai_chat_model,
-        messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+        messages=_build_messages(query, contexts),
         temperature=0.2,
         stream=True,
     )
 
-    for chunk in stream:
+    async for chunk in stream:
         delta = chunk.choices[0].delta.content if chunk.choices else None
         if delta:
             yield delta
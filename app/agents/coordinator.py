@@ -1,14 +1,63 @@
 from __future__ import annotations
 
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 from app.agents.retriever import retrieve_contexts
 from app.agents.answerer import generate_answer
 from app.storage.repository import ensure_session, append_message
 
 
-def run_chat(session_id: str, message: str) -> dict:
+CONTEXT_CACHE_TTL_SECONDS = 60.0
+CONTEXT_CACHE_MAX_ENTRIES = 1024
+SESSION_WRITE_THREADS = 4
+
+_CONTEXT_CACHE: OrderedDict[tuple[str, bytes], tuple[float, list[dict]]] = OrderedDict()
+_CONTEXT_CACHE_LOCK = threading.Lock()
+_SESSION_WRITER = ThreadPoolExecutor(max_workers=SESSION_WRITE_THREADS, thread_name_prefix="session-write")
+
+
+def _context_cache_key(session_id: str, message: str) -> tuple[str, bytes]:
+    normalized = " ".join(message.lower().split())
+    return session_id, hashlib.blake2s(normalized.encode("utf-8")).digest()
+
+
+def _retrieve_contexts_cached(session_id: str, message: str) -> list[dict]:
+    # Only retrieval is cached; the answer is still generated for every turn.
+    key = _context_cache_key(session_id, message)
+    now = time.monotonic()
+    with _CONTEXT_CACHE_LOCK:
+        entry = _CONTEXT_CACHE.get(key)
+        if entry is not None:
+            if now - entry[0] < CONTEXT_CACHE_TTL_SECONDS:
+                _CONTEXT_CACHE.move_to_end(key)
+                return entry[1]
+            del _CONTEXT_CACHE[key]
+
+    contexts = retrieve_contexts(message)
+
+    with _CONTEXT_CACHE_LOCK:
+        _CONTEXT_CACHE[key] = (now, contexts)
+        _CONTEXT_CACHE.move_to_end(key)
+        while len(_CONTEXT_CACHE) > CONTEXT_CACHE_MAX_ENTRIES:
+            _CONTEXT_CACHE.popitem(last=False)
+    return contexts
+
+
+def _record_user_message(session_id: str, message: str) -> None:
     ensure_session(session_id)
     append_message(session_id, "user", message)
-    contexts = retrieve_contexts(message)
+
+
+def run_chat(session_id: str, message: str) -> dict:
+    # Retrieval doesn't read the session, so the user-message writes overlap embed, search and rerank.
+    recorded = _SESSION_WRITER.submit(_record_user_message, session_id, message)
+    contexts = _retrieve_contexts_cached(session_id, message)
+    # Surface a failed write before paying for the LLM call.
+    recorded.result()
     result = generate_answer(message, contexts)
 
     append_message(session_id, "assistant", result["answer"])
@@ -1,36 +1,62 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import time
 import uuid
 
 from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
+import orjson
 
 from ag_ui.core import (
+    EventType,
     RunStartedEvent,
     RunFinishedEvent,
     RunErrorEvent,
-    StepStartedEvent,
-    StepFinishedEvent,
     ToolCallStartEvent,
     ToolCallArgsEvent,
     ToolCallEndEvent,
     ToolCallResultEvent,
     TextMessageStartEvent,
-    TextMessageContentEvent,
     TextMessageEndEvent,
 )
 from ag_ui.encoder import EventEncoder
 
 from app.agents.answerer import stream_answer
-from app.ingest.embedding_client import embed_texts
+from app.ingest.embedding_client import aembed_query
 from app.retrieval.milvus_client import search as milvus_search
-from app.retrieval.rerank import rerank
+from app.retrieval.rerank_cache import rerank_cached
 from app.config import get_settings
 
 router = APIRouter()
 
+_ENCODER = EventEncoder()
+
+
+def _sse(event_type: EventType, **fields) -> bytes:
+    # Same frame as EventEncoder (camelCase keys, no None fields) without pydantic model construction.
+    payload = {"type": event_type.value}
+    payload.update((key, value) for key, value in fields.items() if value is not None)
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+def _text_delta(message_id: str, delta: str) -> bytes:
+    return _sse(EventType.TEXT_MESSAGE_CONTENT, messageId=message_id, delta=delta)
+
+
+_STEPS = ("retrieve", "rerank", "answer")
+# Step boundary events carry no per-request ids, so encode them once.
+_STEP_STARTED = {name: _sse(EventType.STEP_STARTED, stepName=name) for name in _STEPS}
+_STEP_FINISHED = {name: _sse(EventType.STEP_FINISHED, stepName=name) for name in _STEPS}
+# Answer tokens are coalesced into one SSE frame per this many chars or seconds, whichever comes first.
+_DELTA_FLUSH_CHARS = 64
+_DELTA_FLUSH_SECONDS = 0.03
+
+
+def _dumps(obj) -> str:
+    # orjson keeps non-ASCII text as-is, matching json.dumps(..., ensure_ascii=False).
+    return orjson.dumps(obj).decode("utf-8")
+
 
 def _extract_query(payload: dict) -> str:
     if "message" in payload and isinstance(payload["message"], str):
@@ -86,7 +112,7 @@ async def agui_run(request: Request):
     run_id = payload.get("runId") or payload.get("run_id") or str(uuid.uuid4())
     query = _extract_query(payload)
 
-    encoder = EventEncoder()
+    encoder = _ENCODER
 
     async def event_stream():
         try:
@@ -97,30 +123,25 @@ async def agui_run(request: Request):
             yield encoder.encode(
                 TextMessageStartEvent(message_id=progress_message_id, role="assistant")
             )
-            yield encoder.encode(
-                TextMessageContentEvent(
-                    message_id=progress_message_id, delta="进度：开始处理请求...\n"
-                )
-            )
+            yield _text_delta(progress_message_id, "进度：开始处理请求...\n")
             await asyncio.sleep(0)
 
             settings = get_settings()
+            top_n = settings.retrieval_top_n
+            top_k_limit = settings.retrieval_top_k
+            chat_model = settings.openai_chat_model
 
             # Step: retrieve
-            yield encoder.encode(StepStartedEvent(step_name="retrieve"))
-            yield encoder.encode(
-                TextMessageContentEvent(
-                    message_id=progress_message_id, delta="步骤1/3 检索：开始\n"
-                )
-            )
+            yield _STEP_STARTED["retrieve"]
+            yield _text_delta(progress_message_id, "步骤1/3 检索：开始\n")
 
             tool_call_id = str(uuid.uuid4())
             tool_message_id = str(uuid.uuid4())
-            args_json = json.dumps(
+            args_json = _dumps(
                 {
                     "query": query,
-                    "top_n": settings.retrieval_top_n,
-                    "top_k": settings.retrieval_top_k,
+                    "top_n": top_n,
+                    "top_k": top_k_limit,
                 }
             )
 
@@ -133,10 +154,11 @@ async def agui_run(request: Request):
             )
             yield encoder.encode(ToolCallArgsEvent(tool_call_id=tool_call_id, delta=args_json))
 
-            embeddings = embed_texts([query]) if query else []
-            if embeddings:
-                embedding = embeddings[0]
-                candidates = milvus_search(embedding, settings.retrieval_top_n)
+            if query:
+                embedding = await aembed_query(query)
+                candidates = await asyncio.to_thread(
+                    milvus_search, embedding, top_n
+                )
             else:
                 candidates = []
             formatted_candidates = _format_results(
@@ -148,51 +170,33 @@ async def agui_run(request: Request):
                 ToolCallResultEvent(
                     message_id=tool_message_id,
                     tool_call_id=tool_call_id,
-                    content=json.dumps(
-                        {
-                            "candidates": formatted_candidates,
-                        },
-                        ensure_ascii=False,
-                    ),
+                    content=_dumps({"candidates": formatted_candidates}),
                     role="tool",
                 )
             )
 
-            yield encoder.encode(StepFinishedEvent(step_name="retrieve"))
-            yield encoder.encode(
-                TextMessageContentEvent(
-                    message_id=progress_message_id,
-                    delta=f"检索完成：候选 {len(formatted_candidates)} 条\n",
-                )
-            )
+            yield _STEP_FINISHED["retrieve"]
+            yield _text_delta(progress_message_id, f"检索完成：候选 {len(formatted_candidates)} 条\n")
             for idx, item in enumerate(formatted_candidates[:5], start=1):
                 score = item.get("vector_score")
                 score_text = f"{score:.4f}" if isinstance(score, (int, float)) else "n/a"
-                yield encoder.encode(
-                    TextMessageContentEvent(
-                        message_id=progress_message_id,
-                        delta=(
-                            f"- [{idx}] {item.get('source_path')} p.{item.get('page')} "
-                            f"(向量分数 {score_text})\n"
-                        ),
-                    )
+                yield _text_delta(
+                    progress_message_id,
+                    f"- [{idx}] {item.get('source_path')} p.{item.get('page')} "
+                    f"(向量分数 {score_text})\n",
                 )
 
             # Step: rerank
-            yield encoder.encode(StepStartedEvent(step_name="rerank"))
-            yield encoder.encode(
-                TextMessageContentEvent(
-                    message_id=progress_message_id, delta="步骤2/3 重排：开始\n"
-                )
-            )
+            yield _STEP_STARTED["rerank"]
+            yield _text_delta(progress_message_id, "步骤2/3 重排：开始\n")
 
             rerank_tool_id = str(uuid.uuid4())
             rerank_message_id = str(uuid.uuid4())
-            rerank_args = json.dumps(
+            rerank_args = _dumps(
                 {
                     "query": query,
                     "candidates": len(candidates),
-                    "top_k": settings.retrieval_top_k,
+                    "top_k": top_k_limit,
                 }
             )
 
@@ -207,8 +211,8 @@ async def agui_run(request: Request):
                 ToolCallArgsEvent(tool_call_id=rerank_tool_id, delta=rerank_args)
             )
 
-            reranked = rerank(query, candidates)
-            top_k = reranked[: settings.retrieval_top_k]
+            reranked = await asyncio.to_thread(rerank_cached, query, candidates)
+            top_k = reranked[:top_k_limit]
             formatted_rerank = _format_results(
                 top_k, include_vector_score=True, include_rerank_score=True
             )
@@ -218,42 +222,29 @@ async def agui_run(request: Request):
                 ToolCallResultEvent(
                     message_id=rerank_message_id,
                     tool_call_id=rerank_tool_id,
-                    content=json.dumps({"results": formatted_rerank}, ensure_ascii=False),
+                    content=_dumps({"results": formatted_rerank}),
                     role="tool",
                 )
             )
 
-            yield encoder.encode(StepFinishedEvent(step_name="rerank"))
-            yield encoder.encode(
-                TextMessageContentEvent(
-                    message_id=progress_message_id,
-                    delta=f"重排完成：TopK {len(formatted_rerank)} 条\n",
-                )
-            )
+            yield _STEP_FINISHED["rerank"]
+            yield _text_delta(progress_message_id, f"重排完成：TopK {len(formatted_rerank)} 条\n")
             for idx, item in enumerate(formatted_rerank[:5], start=1):
                 score = item.get("rerank_score")
                 score_text = f"{score:.2f}" if isinstance(score, (int, float)) else "n/a"
-                yield encoder.encode(
-                    TextMessageContentEvent(
-                        message_id=progress_message_id,
-                        delta=(
-                            f"- [{idx}] {item.get('source_path')} p.{item.get('page')} "
-                            f"(重排分数 {score_text})\n"
-                        ),
-                    )
+                yield _text_delta(
+                    progress_message_id,
+                    f"- [{idx}] {item.get('source_path')} p.{item.get('page')} "
+                    f"(重排分数 {score_text})\n",
                 )
 
             # Step: answer
-            yield encoder.encode(StepStartedEvent(step_name="answer"))
-            yield encoder.encode(
-                TextMessageContentEvent(
-                    message_id=progress_message_id, delta="步骤3/3 生成回答：开始\n"
-                )
-            )
+            yield _STEP_STARTED["answer"]
+            yield _text_delta(progress_message_id, "步骤3/3 生成回答：开始\n")
 
             answer_tool_id = str(uuid.uuid4())
             answer_message_id = str(uuid.uuid4())
-            answer_args = json.dumps({"model": settings.openai_chat_model})
+            answer_args = _dumps({"model": chat_model})
 
             yield encoder.encode(
                 ToolCallStartEvent(
@@ -271,8 +262,20 @@ async def agui_run(request: Request):
             msg_id = str(uuid.uuid4())
             yield encoder.encode(TextMessageStartEvent(message_id=msg_id, role="assistant"))
 
-            for delta in stream_answer(query, top_k):
-                yield encoder.encode(TextMessageContentEvent(message_id=msg_id, delta=delta))
+            buffer: list[str] = []
+            buffer_len = 0
+            last_flush = time.monotonic()
+            async for delta in stream_answer(query, top_k):
+                buffer.append(delta)
+                buffer_len += len(delta)
+                now = time.monotonic()
+                if buffer_len >= _DELTA_FLUSH_CHARS or now - last_flush >= _DELTA_FLUSH_SECONDS:
+                    yield _text_delta(msg_id, "".join(buffer))
+                    buffer.clear()
+                    buffer_len = 0
+                    last_flush = now
+            if buffer:
+                yield _text_delta(msg_id, "".join(buffer))
 
             yield encoder.encode(TextMessageEndEvent(message_id=msg_id))
 
@@ -281,11 +284,11 @@ async def agui_run(request: Request):
                 ToolCallResultEvent(
                     message_id=answer_message_id,
                     tool_call_id=answer_tool_id,
-                    content=json.dumps({"status": "complete"}, ensure_ascii=False),
+                    content=_dumps({"status": "complete"}),
                     role="tool",
                 )
             )
-            yield encoder.encode(StepFinishedEvent(step_name="answer"))
+            yield _STEP_FINISHED["answer"]
 
             citations = [
                 {
@@ -308,7 +311,7 @@ async def agui_run(request: Request):
             yield encoder.encode(
                 ToolCallArgsEvent(
                     tool_call_id=citations_tool_id,
-                    delta=json.dumps({"count": len(citations)}),
+                    delta=_dumps({"count": len(citations)}),
                 )
             )
             yield encoder.encode(ToolCallEndEvent(tool_call_id=citations_tool_id))
@@ -316,7 +319,7 @@ async def agui_run(request: Request):
                 ToolCallResultEvent(
                     message_id=citations_message_id,
                     tool_call_id=citations_tool_id,
-                    content=json.dumps({"citations": citations}, ensure_ascii=False),
+                    content=_dumps({"citations": citations}),
                     role="tool",
                 )
             )
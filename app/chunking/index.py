@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from app.chunking.recursive import split_recursive
 from app.chunking.sentence import split_sentence
-from app.chunking.semantic import split_semantic
 from app.config import get_settings
 
 
@@ -30,6 +29,9 @@ def chunk_text(text: str) -> list[str]:
     if strategy == "sentence":
         return split_sentence(text, max_tokens, overlap)
     if strategy == "semantic":
+        # Semantic splitting calls the embedding service; import it only for this strategy.
+        from app.chunking.semantic import split_semantic
+
         return split_semantic(text, max_tokens, overlap)
 
     return split_recursive(text, max_tokens, overlap, DEFAULT_SEPARATORS)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from app.chunking.utils import count_tokens
+from app.chunking.utils import apply_overlap, count_tokens
 
 
 def split_recursive(
@@ -13,63 +13,60 @@ def split_recursive(
     if not text:
         return []
 
-    if count_tokens(text) <= max_tokens:
-        return [text]
+    final_chunks: list[str] = []
+    # Depth-first work stack of (text, token_count, first separator index). Children are
+    # pushed in reverse so finished chunks come out in document order.
+    work: list[tuple[str, int, int]] = [(text, count_tokens(text), 0)]
+    while work:
+        current_text, tokens, sep_start = work.pop()
+        if tokens <= max_tokens:
+            final_chunks.append(current_text)
+            continue
 
-    for sep in separators:
-        if sep in text:
-            parts = [p.strip() for p in text.split(sep) if p.strip()]
+        grouped: list[tuple[str, int]] | None = None
+        next_sep = sep_start
+        for sep_index in range(sep_start, len(separators)):
+            sep = separators[sep_index]
+            if sep not in current_text:
+                continue
+            parts = [p for p in map(str.strip, current_text.split(sep)) if p]
             if not parts:
                 continue
-            chunks: list[str] = []
-            current = ""
-            for part in parts:
-                candidate = f"{current}{sep}{part}" if current else part
-                if count_tokens(candidate) <= max_tokens:
-                    current = candidate
-                else:
-                    if current:
-                        chunks.append(current)
-                    current = part
-            if current:
-                chunks.append(current)
+            grouped = _group_parts(parts, sep, max_tokens)
+            next_sep = sep_index + 1
+            break
+
+        if grouped is None:
+            # Fallback hard split by token count; overlap is applied once over all chunks below.
+            final_chunks.extend(_hard_split(current_text, max_tokens, 0))
+            continue
+        # Oversized groups are split again with the remaining, finer separators.
+        work.extend((chunk, chunk_tokens, next_sep) for chunk, chunk_tokens in reversed(grouped))
+
+    return apply_overlap(final_chunks, overlap_tokens)
 
-            # If chunks are still too large, recurse deeper
-            final_chunks: list[str] = []
-            for chunk in chunks:
-                if count_tokens(chunk) > max_tokens:
-                    final_chunks.extend(split_recursive(chunk, max_tokens, overlap_tokens, separators[1:]))
-                else:
-                    final_chunks.append(chunk)
-            return _apply_overlap(final_chunks, overlap_tokens)
 
-    # Fallback hard split by token count
-    return _hard_split(text, max_tokens, overlap_tokens)
+def _group_parts(parts: list[str], sep: str, max_tokens: int) -> list[tuple[str, int]]:
+    # Token counts aren't additive across a join: BPE merges a space separator into the next word, so
+    # each candidate group is counted as joined text. The counts are carried on to skip re-encoding.
+    chunks: list[tuple[str, int]] = []
+    group_start = 0
+    current_tokens = count_tokens(parts[0])
+    for i in range(1, len(parts)):
+        candidate_tokens = count_tokens(sep.join(parts[group_start : i + 1]))
+        if candidate_tokens <= max_tokens:
+            current_tokens = candidate_tokens
+            continue
+        chunks.append((sep.join(parts[group_start:i]), current_tokens))
+        group_start = i
+        current_tokens = count_tokens(parts[i])
+    chunks.append((sep.join(parts[group_start:]), current_tokens))
+    return chunks
 
 
 def _hard_split(text: str, max_tokens: int, overlap_tokens: int) -> list[str]:
     # Fallback character split by approximate token ratio
     if max_tokens <= 0:
         return [text]
-    tokens = list(text)
-    chunks = []
     step = max(1, max_tokens - overlap_tokens)
-    for i in range(0, len(tokens), step):
-        chunk = "".join(tokens[i : i + max_tokens])
-        chunks.append(chunk)
-    return chunks
-
-
-def _apply_overlap(chunks: list[str], overlap_tokens: int) -> list[str]:
-    if overlap_tokens <= 0 or len(chunks) <= 1:
-        return chunks
-    overlapped: list[str] = []
-    for i, chunk in enumerate(chunks):
-        if i == 0:
-            overlapped.append(chunk)
-            continue
-        prev = overlapped[-1]
-        # naive overlap by last N characters of prev
-        overlap = prev[-overlap_tokens:] if len(prev) > overlap_tokens else prev
-        overlapped.append(f"{overlap}{chunk}")
-    return overlapped
+    return [text[i : i + max_tokens] for i in range(0, len(text), step)]
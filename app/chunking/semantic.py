@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-import math
-from typing import List
+import numpy as np
 
-from app.chunking.utils import split_sentences, count_tokens
+from app.chunking.utils import apply_overlap, split_sentences, count_tokens
 from app.ingest.embedding_client import embed_texts
 
 
@@ -14,58 +13,40 @@ def split_semantic(text: str, max_tokens: int, overlap_tokens: int, sim_threshol
     sentences = split_sentences(text)
     if not sentences:
         return []
-    vectors = embed_texts(sentences)
+    vectors = np.asarray(embed_texts(sentences), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1) if vectors.ndim == 2 else np.zeros(len(sentences), dtype=np.float32)
     chunks: list[str] = []
 
     current_sentences = [sentences[0]]
-    current_vec = vectors[0]
+    # Each merge averages the chunk vector with the new sentence's, so later sentences weigh more.
+    current_vec = vectors[0].copy()
     current_tokens = count_tokens(sentences[0])
 
     for i in range(1, len(sentences)):
         sent = sentences[i]
-        vec = vectors[i]
-        sim = _cosine(current_vec, vec)
+        sim = _cosine(current_vec, vectors[i], norms[i])
         sent_tokens = count_tokens(sent)
         if sim >= sim_threshold and (current_tokens + sent_tokens) <= max_tokens:
             current_sentences.append(sent)
             current_tokens += sent_tokens
-            current_vec = _avg_vec(current_vec, vec)
+            current_vec += vectors[i]
+            current_vec *= 0.5
         else:
             chunks.append(" ".join(current_sentences))
             current_sentences = [sent]
-            current_vec = vec
+            current_vec = vectors[i].copy()
             current_tokens = sent_tokens
 
     if current_sentences:
         chunks.append(" ".join(current_sentences))
 
-    return _apply_overlap(chunks, overlap_tokens)
+    return apply_overlap(chunks, overlap_tokens)
 
 
-def _cosine(a: List[float], b: List[float]) -> float:
-    if not a or not b:
+def _cosine(a: np.ndarray, b: np.ndarray, b_norm: float) -> float:
+    if a.size == 0 or b.size == 0:
         return 0.0
-    dot = sum(x * y for x, y in zip(a, b))
-    norm_a = math.sqrt(sum(x * x for x in a))
-    norm_b = math.sqrt(sum(y * y for y in b))
-    if norm_a == 0 or norm_b == 0:
+    a_norm = float(np.linalg.norm(a))
+    if a_norm == 0 or b_norm == 0:
         return 0.0
-    return dot / (norm_a * norm_b)
-
-
-def _avg_vec(a: List[float], b: List[float]) -> List[float]:
-    return [(x + y) / 2.0 for x, y in zip(a, b)]
-
-
-def _apply_overlap(chunks: list[str], overlap_tokens: int) -> list[str]:
-    if overlap_tokens <= 0 or len(chunks) <= 1:
-        return chunks
-    overlapped: list[str] = []
-    for i, chunk in enumerate(chunks):
-        if i == 0:
-            overlapped.append(chunk)
-            continue
-        prev = overlapped[-1]
-        overlap = prev[-overlap_tokens:] if len(prev) > overlap_tokens else prev
-        overlapped.append(f"{overlap}{chunk}")
-    return overlapped
+    return float(a @ b) / (a_norm * float(b_norm))
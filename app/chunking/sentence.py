@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from app.chunking.utils import split_sentences, count_tokens
+from app.chunking.utils import apply_overlap, split_sentences, count_tokens
 
 
 def split_sentence(text: str, max_tokens: int, overlap_tokens: int) -> list[str]:
@@ -8,7 +8,8 @@ def split_sentence(text: str, max_tokens: int, overlap_tokens: int) -> list[str]
     chunks: list[str] = []
     current = ""
     for sent in sentences:
-        candidate = f"{current} {sent}".strip() if current else sent
+        # Counted joined: BPE merges the joining space into the next word, so per-sentence counts don't add up.
+        candidate = f"{current} {sent}" if current else sent
         if count_tokens(candidate) <= max_tokens:
             current = candidate
         else:
@@ -17,18 +18,4 @@ def split_sentence(text: str, max_tokens: int, overlap_tokens: int) -> list[str]
             current = sent
     if current:
         chunks.append(current)
-    return _apply_overlap(chunks, overlap_tokens)
-
-
-def _apply_overlap(chunks: list[str], overlap_tokens: int) -> list[str]:
-    if overlap_tokens <= 0 or len(chunks) <= 1:
-        return chunks
-    overlapped: list[str] = []
-    for i, chunk in enumerate(chunks):
-        if i == 0:
-            overlapped.append(chunk)
-            continue
-        prev = overlapped[-1]
-        overlap = prev[-overlap_tokens:] if len(prev) > overlap_tokens else prev
-        overlapped.append(f"{overlap}{chunk}")
-    return overlapped
+    return apply_overlap(chunks, overlap_tokens)
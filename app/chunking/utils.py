@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 from typing import Iterable
 
 import tiktoken
 
+# Simple multilingual sentence splitter (Chinese + English punctuation)
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[。！？.!?])\s+")
 
+
+@lru_cache(maxsize=1)
 def get_encoder():
     return tiktoken.get_encoding("cl100k_base")
 
@@ -15,8 +20,27 @@ def count_tokens(text: str) -> int:
     return len(enc.encode(text))
 
 
+def count_tokens_batch(texts: list[str]) -> list[int]:
+    if not texts:
+        return []
+    enc = get_encoder()
+    return [len(tokens) for tokens in enc.encode_batch(texts, num_threads=8)]
+
+
+def apply_overlap(chunks: list[str], overlap_tokens: int) -> list[str]:
+    if overlap_tokens <= 0 or len(chunks) <= 1:
+        return chunks
+    enc = get_encoder()
+    # Prefix each chunk with the last overlap_tokens tokens of the chunk before it.
+    tails = [tokens[-overlap_tokens:] for tokens in enc.encode_batch(chunks[:-1], num_threads=8)]
+    # A token tail can start mid-character for CJK text; drop any partial leading bytes.
+    overlaps = [raw.decode("utf-8", errors="ignore") for raw in enc.decode_bytes_batch(tails)]
+    overlapped = [chunks[0]]
+    for overlap, chunk in zip(overlaps, chunks[1:]):
+        overlapped.append(f"{overlap}{chunk}")
+    return overlapped
+
+
 def split_sentences(text: str) -> list[str]:
-    # Simple multilingual sentence splitter (Chinese + English punctuation)
-    pattern = r"(?<=[。！？.!?])\s+"
-    parts = re.split(pattern, text)
+    parts = SENTENCE_SPLIT_RE.split(text)
     return [p.strip() for p in parts if p.strip()]
@@ -26,8 +26,10 @@ class Settings(BaseModel):
     embedding_dim: int = Field(1024, alias="EMBEDDING_DIM")
     embedding_batch_size: int = Field(32, alias="EMBEDDING_BATCH_SIZE")
     embedding_concurrency: int = Field(2, alias="EMBEDDING_CONCURRENCY")
+    embedding_coalesce_ms: int = Field(5, alias="EMBEDDING_COALESCE_MS")
 
     milvus_insert_batch: int = Field(200, alias="MILVUS_INSERT_BATCH")
+    ingest_workers: int = Field(2, alias="INGEST_WORKERS")
 
     chunk_strategy: str = Field("recursive", alias="CHUNK_STRATEGY")
     chunk_size_tokens: int = Field(800, alias="CHUNK_SIZE_TOKENS")
@@ -35,6 +37,10 @@ class Settings(BaseModel):
 
     retrieval_top_n: int = Field(20, alias="RETRIEVAL_TOP_N")
     retrieval_top_k: int = Field(5, alias="RETRIEVAL_TOP_K")
+    rerank_cache_size: int = Field(4096, alias="RERANK_CACHE_SIZE")
+    # "llm" asks the chat model; "cross_encoder" scores on the embedding service's /rerank.
+    rerank_backend: str = Field("llm", alias="RERANK_BACKEND")
+    reranker_url: str = Field("http://localhost:8001/rerank", alias="RERANKER_URL")
 
     host: str = Field("0.0.0.0", alias="HOST")
     port: int = Field(8000, alias="PORT")
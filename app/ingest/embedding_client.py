@@ -1,52 +1,215 @@
 from __future__ import annotations
 
-from typing import Iterable
+import asyncio
+import base64
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import httpx
+import numpy as np
+import orjson
 
 from app.config import get_settings
 
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+_LOGGER = logging.getLogger("embedding")
+# Keyed by the loop itself: ids of finished loops get reused, and a client or coalescer must never cross loops.
+_ASYNC_CLIENTS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[httpx.AsyncClient, asyncio.Task]] = (
+    weakref.WeakKeyDictionary()
+)
+_COALESCERS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, "EmbedCoalescer"] = weakref.WeakKeyDictionary()
+_QUERY_EMBEDDINGS: OrderedDict[str, np.ndarray] = OrderedDict()
+_QUERY_EMBEDDINGS_LOCK = threading.Lock()
+
+
+def _build_client(concurrency: int) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(timeout=300, limits=limits)
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    # AsyncClient connection pools are bound to the loop that opened them, so keep one per loop.
+    loop = asyncio.get_running_loop()
+    entry = _ASYNC_CLIENTS.get(loop)
+    if entry is not None and not entry[0].is_closed:
+        return entry[0]
+    if entry is not None:
+        entry[1].cancel()
+    settings = get_settings()
+    client = _build_client(max(1, settings.embedding_concurrency))
+    _ASYNC_CLIENTS[loop] = (client, loop.create_task(_close_client_at_shutdown(loop, client)))
+    return client
+
+
+async def _close_client_at_shutdown(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> None:
+    # Parked until asyncio.run() cancels leftover tasks at loop shutdown, so the pool closes on its own loop.
+    # Open connections reference the loop, so the entry is also dropped here rather than left to the weak key.
+    try:
+        await loop.create_future()
+    finally:
+        entry = _ASYNC_CLIENTS.get(loop)
+        if entry is not None and entry[0] is client:
+            del _ASYNC_CLIENTS[loop]
+        await client.aclose()
+
+
+def _empty_vectors() -> np.ndarray:
+    return np.empty((0, get_settings().embedding_dim), dtype=np.float32)
+
+
+def _decode_vectors(data: dict) -> np.ndarray:
+    if "vectors_b64" in data:
+        vectors = np.frombuffer(base64.b64decode(data["vectors_b64"]), dtype=np.float32)
+        return vectors.reshape(-1, data["dim"]) if data["dim"] else vectors.reshape(0, 0)
+    # Services without the binary format still answer with a JSON float list.
+    # Milvus stores FLOAT_VECTOR as float32, so downcast once here rather than per hop.
+    return np.asarray(data["vectors"], dtype=np.float32).reshape(len(data["vectors"]), -1)
+
+
+async def aembed_texts(
+    texts: list[str], client: httpx.AsyncClient | None = None, out: np.ndarray | None = None
+) -> np.ndarray:
+    """Embed texts and return a float32 array of shape (len(texts), dim).
+
+    When ``out`` is given, each batch is written into its rows directly and ``out`` is returned.
+    """
     settings = get_settings()
-    vectors: list[list[float]] = []
     batch_size = max(1, settings.embedding_batch_size)
     concurrency = max(1, settings.embedding_concurrency)
-    batches = [(i, texts[i : i + batch_size]) for i in range(0, len(texts), batch_size)]
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
     if not batches:
-        return []
+        return _empty_vectors() if out is None else out
+    if out is not None and len(out) != len(texts):
+        raise ValueError(f"Output has {len(out)} rows for {len(texts)} texts")
 
-    logger = logging.getLogger("embedding")
+    client = client or _get_async_client()
+    sem = asyncio.Semaphore(concurrency)
+    completed = 0
 
-    def _embed_batch(batch_texts: list[str]) -> list[list[float]]:
-        payload = {"texts": batch_texts}
-        with httpx.Client(timeout=300) as client:
-            resp = client.post(settings.embedding_url, json=payload)
+    async def _embed_batch(start: int, batch_texts: list[str]) -> np.ndarray:
+        nonlocal completed
+        async with sem:
+            resp = await client.post(
+                settings.embedding_url, json={"texts": batch_texts, "include_result": False, "format": "b64"}
+            )
             resp.raise_for_status()
-            data = resp.json()
-            return data["vectors"]
-
-    results: list[list[list[float]] | None] = [None] * len(batches)
-
-    if concurrency == 1:
-        for idx, batch in enumerate(batches):
-            logger.info("Embedding batch %d/%d (size=%d)", idx + 1, len(batches), len(batch[1]))
-            results[idx] = _embed_batch(batch[1])
-    else:
-        with ThreadPoolExecutor(max_workers=concurrency) as ex:
-            futures = {}
-            for idx, batch in enumerate(batches):
-                futures[ex.submit(_embed_batch, batch[1])] = idx
-            completed = 0
-            for fut in as_completed(futures):
-                idx = futures[fut]
-                results[idx] = fut.result()
-                completed += 1
-                logger.info("Embedding batch %d/%d completed", completed, len(batches))
-
-    for item in results:
-        if item:
-            vectors.extend(item)
-    return vectors
+            data = orjson.loads(resp.content)
+        completed += 1
+        _LOGGER.info("Embedding batch %d/%d completed (size=%d)", completed, len(batches), len(batch_texts))
+        vectors = _decode_vectors(data)
+        if out is not None:
+            if len(vectors) != len(batch_texts):
+                raise RuntimeError(f"Embedding count mismatch: {len(vectors)} vs {len(batch_texts)}")
+            out[start : start + len(vectors)] = vectors
+        return vectors
+
+    results = await asyncio.gather(
+        *(_embed_batch(i * batch_size, batch) for i, batch in enumerate(batches))
+    )
+    if out is not None:
+        return out
+    results = [item for item in results if len(item)]
+    if not results:
+        return _empty_vectors()
+    return np.concatenate(results, axis=0)
+
+
+class EmbedCoalescer:
+    """Micro-batches single-text embeds that arrive within a short window into one request."""
+
+    def __init__(self, window_seconds: float) -> None:
+        self.window_seconds = window_seconds
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_task: asyncio.Task | None = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((text, future))
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_after_window())
+        return await future
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self.window_seconds)
+        pending, self._pending = self._pending, []
+        self._flush_task = None
+        try:
+            vectors = await aembed_texts([text for text, _ in pending])
+            if len(vectors) != len(pending):
+                raise RuntimeError(f"Embedding count mismatch: {len(vectors)} vs {len(pending)}")
+        except Exception as exc:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), vector in zip(pending, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+def _cached_query_embedding(text: str) -> np.ndarray | None:
+    with _QUERY_EMBEDDINGS_LOCK:
+        vector = _QUERY_EMBEDDINGS.get(text)
+        if vector is not None:
+            _QUERY_EMBEDDINGS.move_to_end(text)
+        return vector
+
+
+def _store_query_embedding(text: str, vector: np.ndarray) -> np.ndarray:
+    # Own a read-only copy: a row view would pin its whole batch, and callers share the cached array.
+    vector = np.array(vector, dtype=np.float32)
+    vector.setflags(write=False)
+    with _QUERY_EMBEDDINGS_LOCK:
+        _QUERY_EMBEDDINGS[text] = vector
+        _QUERY_EMBEDDINGS.move_to_end(text)
+        while len(_QUERY_EMBEDDINGS) > QUERY_EMBEDDING_CACHE_SIZE:
+            _QUERY_EMBEDDINGS.popitem(last=False)
+    return vector
+
+
+async def aembed_query(text: str) -> np.ndarray:
+    """Embed one query, sharing an embedding request with concurrent callers on this loop.
+
+    Query vectors are cached, so repeated questions skip the embedding service; the result is read-only.
+    """
+    vector = _cached_query_embedding(text)
+    if vector is not None:
+        return vector
+    loop = asyncio.get_running_loop()
+    coalescer = _COALESCERS.get(loop)
+    if coalescer is None:
+        coalescer = EmbedCoalescer(max(0, get_settings().embedding_coalesce_ms) / 1000.0)
+        _COALESCERS[loop] = coalescer
+    return _store_query_embedding(text, await coalescer.embed(text))
+
+
+def embed_query(text: str) -> np.ndarray:
+    """Synchronous aembed_query, backed by the same query cache."""
+    vector = _cached_query_embedding(text)
+    if vector is not None:
+        return vector
+    return _store_query_embedding(text, embed_texts([text])[0])
+
+
+async def _embed_texts_once(texts: list[str], out: np.ndarray | None) -> np.ndarray:
+    settings = get_settings()
+    async with _build_client(max(1, settings.embedding_concurrency)) as client:
+        return await aembed_texts(texts, client=client, out=out)
+
+
+def embed_texts(texts: list[str], out: np.ndarray | None = None) -> np.ndarray:
+    if not texts:
+        return _empty_vectors() if out is None else out
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_embed_texts_once(texts, out))
+    # Called from inside an event loop: run the pipeline on a worker thread with its own loop.
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, _embed_texts_once(texts, out)).result()
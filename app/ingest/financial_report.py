@@ -1,19 +1,31 @@
 from __future__ import annotations
 
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from itertools import accumulate
 from pathlib import Path
+import atexit
 import os
+import pickle
 import hashlib
 import html
-import json
 import re
+import selectors
 import subprocess
 import tempfile
+import threading
+import time
+from typing import Iterator
+
+import ijson
+import orjson
 
 from app.ingest.metric_defs import infer_statement_type_from_rows
-from app.ingest.parser_pdf import parse_pdf
+from app.ingest.parser_pdf import parse_pdf, pdf_text_backend
 
 
 STATEMENT_KEYWORDS = {
@@ -23,6 +35,14 @@ STATEMENT_KEYWORDS = {
     "changes_in_equity": ["所有者权益变动表", "股东权益变动表", "changes in equity"],
 }
 CAS_BACKGROUND_RULES_PATH = Path(__file__).resolve().parents[2] / "data" / "taxonomy" / "cas2020_background_rules.json"
+HTML_PARALLEL_MIN_PAGES = 8
+# Fold NBSP and ideographic spaces once per MinerU page. Fullwidth punctuation is left alone:
+# metadata lines split on "：" and only ASCII parentheses mark negative numbers.
+SPACE_TRANSLATION = str.maketrans({"\u00a0": " ", "\u3000": " "})
+# A MinerU server silent for this long is treated as hung and restarted.
+MINERU_REPLY_TIMEOUT_SECONDS = 1800.0
+# Bump when parsing output changes so REPORT_PARSE_CACHE_DIR entries from older code are ignored.
+REPORT_CACHE_VERSION = 1
 
 UNIT_PATTERNS = [
     ("万元", "CNY", "10k"),
@@ -32,40 +52,62 @@ UNIT_PATTERNS = [
     ("USD", "USD", None),
     ("美元", "USD", None),
 ]
+HEADER_ROW_KEYWORDS = ("项目", "期末", "期初", "本期", "上期")
+# Any header keyword or a year, checked in one scan.
+HEADER_ROW_RE = re.compile("|".join(map(re.escape, HEADER_ROW_KEYWORDS)) + r"|20\d{2}")
 
 NUMBER_RE = re.compile(r"(?<![\w.%])[\(]?-?\d{1,3}(?:,\d{3})*(?:\.\d+)?[\)]?(?![\w.%])")
 DATE_RE = re.compile(r"(20\d{2})\s*[年\-/]\s*(\d{1,2})\s*[月\-/]\s*(\d{1,2})")
 YEAR_RE = re.compile(r"(20\d{2})")
+# YEAR_RE and DATE_RE in one pattern: every match is a year, and month/day are set when it starts a date.
+PERIOD_RE = re.compile(r"(20\d{2})(?:\s*[年\-/]\s*(\d{1,2})\s*[月\-/]\s*(\d{1,2}))?")
 UNIT_HINT_RE = re.compile(r"单位\s*[:：]?\s*([^\n；;。]{1,24})")
-HTML_TABLE_RE = re.compile(r"<table\b.*?>.*?</table>", re.IGNORECASE | re.DOTALL)
-HTML_ROW_RE = re.compile(r"<tr\b.*?>.*?</tr>", re.IGNORECASE | re.DOTALL)
-HTML_CELL_RE = re.compile(r"<t[dh]\b.*?>.*?</t[dh]>", re.IGNORECASE | re.DOTALL)
-HTML_CELL_OPEN_RE = re.compile(r"^<t[dh]\b([^>]*)>", re.IGNORECASE | re.DOTALL)
+HTML_TABLE_RE = re.compile(r"<table\b[^>]*>.*?</table>", re.IGNORECASE | re.DOTALL)
+HTML_ROW_RE = re.compile(r"<tr\b[^>]*>.*?</tr>", re.IGNORECASE | re.DOTALL)
+# Captures a cell's attributes and body in the same match, so spans need no second parse of the open tag.
+HTML_CELL_RE = re.compile(r"<t[dh]\b(?P<attrs>[^>]*)>(?P<body>.*?)</t[dh]>", re.IGNORECASE | re.DOTALL)
 HTML_SPAN_RE = re.compile(r"\b(?P<name>rowspan|colspan)\s*=\s*['\"]?(?P<value>\d+)", re.IGNORECASE)
+HTML_BR_RE = re.compile(r"<br\s*/?>", re.IGNORECASE)
+HTML_TAG_RE = re.compile(r"<[^>]+>")
 ELR_CODE_RE = re.compile(r"[\[【]\s*([0-9]{6}[a-z]?)\s*[\]】]", re.IGNORECASE)
+METADATA_KEYWORD_RE = re.compile(
+    r"(?P<title>年度报告|年报|annual report)|(?P<company>公司名称)|(?P<ticker>股票代码|证券代码)", re.IGNORECASE
+)
+# One pass over the text finds every statement keyword and ELR code; the group name says which.
+# The lookahead is zero-width, so overlapping keywords are all seen ("income statement of financial position").
+STATEMENT_SCAN_RE = re.compile(
+    "(?=(?:"
+    + "|".join(
+        f"(?P<{statement}>{'|'.join(re.escape(key) for key in keys)})"
+        for statement, keys in STATEMENT_KEYWORDS.items()
+    )
+    + r"|[\[【]\s*(?P<elr_code>[0-9]{6}[a-z]?)\s*[\]】]))",
+    re.IGNORECASE,
+)
+_TOP_STATEMENT = next(iter(STATEMENT_KEYWORDS))
 
 
-@dataclass
+@dataclass(slots=True)
 class PageContent:
     page: int
     text_raw: str
     text_md: str
 
 
-@dataclass
+@dataclass(slots=True)
 class TableCell:
     value: Decimal | None
     raw_text: str | None
 
 
-@dataclass
+@dataclass(slots=True)
 class TableRow:
     label: str
     cells: list[TableCell]
     page_number: int | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TableColumn:
     label: str
     period_start: date | None = None
@@ -74,7 +116,7 @@ class TableColumn:
     fiscal_period: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TableBlock:
     title: str | None
     section_title: str | None
@@ -88,7 +130,7 @@ class TableBlock:
     rows: list[TableRow]
 
 
-@dataclass
+@dataclass(slots=True)
 class ReportMeta:
     report_title: str | None
     company_name: str | None
@@ -118,8 +160,8 @@ def _load_background_validation(path: Path) -> tuple[dict[str, str], set[str]]:
     if not path.exists():
         return {}, set()
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except (OSError, json.JSONDecodeError):
+        data = orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
         return {}, set()
 
     elr_map: dict[str, str] = {}
@@ -149,33 +191,44 @@ ELR_STATEMENT_MAP, KNOWN_ELEMENT_TYPES = _load_background_validation(CAS_BACKGRO
 
 
 def sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
+    # Stored as financial_reports.source_hash (unique) for duplicate detection; changing the
+    # algorithm would make every previously ingested report look new.
     with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        # Python 3.10: reuse one buffer instead of allocating a bytes object per chunk.
+        h = hashlib.sha256()
+        buf = bytearray(1024 * 1024)
+        view = memoryview(buf)
+        while size := f.readinto(buf):
+            h.update(view[:size])
     return h.hexdigest()
 
 
-def _find_mineru_markdown(output_root: Path, source_path: Path) -> list[Path]:
-    preferred_root = output_root / source_path.stem
-    roots = [preferred_root, output_root] if preferred_root != output_root else [output_root]
-    for root in roots:
-        if root.exists():
-            md_files = sorted(root.rglob("*.md"))
-            if md_files:
-                return md_files
-    return []
-
-
-def _find_mineru_content_list(output_root: Path, source_path: Path) -> Path | None:
+def _find_mineru_outputs(output_root: Path, source_path: Path) -> tuple[Path | None, list[Path]]:
+    """Return (first *_content_list.json, sorted *.md files), walking each root at most once."""
     preferred_root = output_root / source_path.stem
     roots = [preferred_root, output_root] if preferred_root != output_root else [output_root]
+    content_list: Path | None = None
+    md_files: list[Path] = []
     for root in roots:
-        if root.exists():
-            candidates = sorted(root.rglob("*_content_list.json"))
-            if candidates:
-                return candidates[0]
-    return None
+        if content_list is not None and md_files:
+            break
+        if not root.exists():
+            continue
+        found_lists: list[Path] = []
+        found_md: list[Path] = []
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if name.endswith("_content_list.json"):
+                    found_lists.append(Path(dirpath, name))
+                elif name.endswith(".md"):
+                    found_md.append(Path(dirpath, name))
+        if content_list is None and found_lists:
+            content_list = min(found_lists)
+        if not md_files and found_md:
+            md_files = sorted(found_md)
+    return content_list, md_files
 
 
 def _normalize_caption(value: object) -> list[str]:
@@ -187,15 +240,18 @@ def _normalize_caption(value: object) -> list[str]:
     return [text] if text else []
 
 
-def _mineru_pages_from_content_list(path: Path) -> list[PageContent]:
-    items = json.loads(path.read_text(encoding="utf-8", errors="ignore"))
-    if not isinstance(items, list):
-        return []
+def _iter_content_list(path: Path) -> Iterator[object]:
+    # content_list.json can run to tens of MB; stream the top-level array instead of loading it whole.
+    with path.open("rb") as f:
+        yield from ijson.items(f, "item")
 
-    pages_md: dict[int, list[str]] = {}
-    pages_raw: dict[int, list[str]] = {}
 
-    for item in items:
+def _mineru_pages_from_content_list(path: Path) -> list[PageContent]:
+    # MinerU page indexes are dense, so index lists by page number (slot 0 stays unused).
+    pages_md: list[list[str]] = [[]]
+    pages_raw: list[list[str]] = [[]]
+
+    for item in _iter_content_list(path):
         if not isinstance(item, dict):
             continue
         page_idx = item.get("page_idx")
@@ -205,8 +261,13 @@ def _mineru_pages_from_content_list(path: Path) -> list[PageContent]:
             page_number = int(page_idx) + 1
         except (TypeError, ValueError):
             continue
-        md_parts = pages_md.setdefault(page_number, [])
-        raw_parts = pages_raw.setdefault(page_number, [])
+        if page_number < 1:
+            continue
+        while len(pages_md) <= page_number:
+            pages_md.append([])
+            pages_raw.append([])
+        md_parts = pages_md[page_number]
+        raw_parts = pages_raw[page_number]
 
         item_type = item.get("type")
         if item_type:
@@ -240,9 +301,9 @@ def _mineru_pages_from_content_list(path: Path) -> list[PageContent]:
             continue
 
     results: list[PageContent] = []
-    for page_number in sorted(pages_md.keys()):
-        md_text = "\n\n".join(pages_md.get(page_number, [])).strip()
-        raw_text = "\n".join(pages_raw.get(page_number, [])).strip()
+    for page_number in range(1, len(pages_md)):
+        md_text = "\n\n".join(pages_md[page_number]).translate(SPACE_TRANSLATION).strip()
+        raw_text = "\n".join(pages_raw[page_number]).translate(SPACE_TRANSLATION).strip()
         if not md_text and not raw_text:
             continue
         results.append(PageContent(page=page_number, text_raw=raw_text, text_md=md_text))
@@ -260,9 +321,107 @@ def _build_mineru_env() -> dict[str, str]:
     return env
 
 
+class MineruWorker:
+    """Long-lived MinerU process started from MINERU_SERVER_CMD, so models load once per batch.
+
+    The command reads one JSON request per stdin line, {"input": <pdf>, "output": <dir>}, writes
+    the usual MinerU artifacts under "output" and answers with a JSON line such as {"ok": true}.
+    Other stdout lines (logs) are skipped.
+    """
+
+    def __init__(self, cmd: str, reply_timeout: float = MINERU_REPLY_TIMEOUT_SECONDS) -> None:
+        self.cmd = cmd
+        self.reply_timeout = reply_timeout
+        self._proc: subprocess.Popen | None = None
+        self._buffer = b""
+        self._lock = threading.Lock()
+
+    def extract(self, input_path: Path, output_root: Path) -> None:
+        request = orjson.dumps({"input": str(input_path), "output": str(output_root)}) + b"\n"
+        with self._lock:
+            proc = self._proc
+            if proc is None or proc.poll() is not None:
+                proc = subprocess.Popen(
+                    self.cmd, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=_build_mineru_env()
+                )
+                self._proc = proc
+                self._buffer = b""
+            try:
+                proc.stdin.write(request)
+                proc.stdin.flush()
+                reply = self._read_reply(proc, time.monotonic() + self.reply_timeout)
+            except OSError:
+                reply = None
+            except subprocess.TimeoutExpired:
+                # A hung server would block every later extract behind the lock; start afresh next time.
+                proc.kill()
+                proc.wait()
+                self._proc = None
+                raise
+        if not isinstance(reply, dict) or not reply.get("ok", True):
+            raise subprocess.CalledProcessError(proc.poll() or 1, self.cmd)
+
+    def _read_reply(self, proc: subprocess.Popen, deadline: float) -> dict | None:
+        # Reads the raw pipe so select() sees every pending byte; a buffered readline() could block past the deadline.
+        fd = proc.stdout.fileno()
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while True:
+                line, newline, rest = self._buffer.partition(b"\n")
+                if newline:
+                    self._buffer = rest
+                    try:
+                        reply = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        continue
+                    if isinstance(reply, dict):
+                        return reply
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    raise subprocess.TimeoutExpired(self.cmd, self.reply_timeout)
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    return None
+                self._buffer += chunk
+
+    def close(self) -> None:
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        proc.stdin.close()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+_MINERU_WORKERS: dict[str, MineruWorker] = {}
+_MINERU_WORKERS_LOCK = threading.Lock()
+
+
+def _get_mineru_worker(cmd: str) -> MineruWorker:
+    with _MINERU_WORKERS_LOCK:
+        worker = _MINERU_WORKERS.get(cmd)
+        if worker is None:
+            worker = _MINERU_WORKERS[cmd] = MineruWorker(cmd)
+        return worker
+
+
+@atexit.register
+def _close_mineru_workers() -> None:
+    with _MINERU_WORKERS_LOCK:
+        workers = list(_MINERU_WORKERS.values())
+        _MINERU_WORKERS.clear()
+    for worker in workers:
+        worker.close()
+
+
 def _mineru_extract(path: Path) -> list[PageContent] | None:
     cmd_template = os.getenv("MINERU_CMD")
-    if not cmd_template:
+    server_cmd = os.getenv("MINERU_SERVER_CMD")
+    if not cmd_template and not server_cmd:
         return None
 
     output_override = os.getenv("MINERU_OUTPUT_DIR")
@@ -275,20 +434,24 @@ def _mineru_extract(path: Path) -> list[PageContent] | None:
         output_root = Path(tmp_context.name)
 
     try:
-        cmd = cmd_template.format(input=str(path), output=str(output_root))
-        mineru_env = _build_mineru_env()
         try:
-            subprocess.run(cmd, shell=True, check=True, env=mineru_env)
+            if server_cmd:
+                _get_mineru_worker(server_cmd).extract(path, output_root)
+            else:
+                cmd = cmd_template.format(input=str(path), output=str(output_root))
+                subprocess.run(cmd, shell=True, check=True, env=_build_mineru_env())
         except subprocess.CalledProcessError:
             # MinerU may still generate output files even when CLI exits non-zero.
             # Continue and try to load parsed artifacts from output_root.
             pass
-        content_list = _find_mineru_content_list(output_root, path)
+        except subprocess.TimeoutExpired:
+            # Killed mid-write, so whatever it left behind may be truncated.
+            return None
+        content_list, md_files = _find_mineru_outputs(output_root, path)
         if content_list:
             pages = _mineru_pages_from_content_list(content_list)
             if pages:
                 return pages
-        md_files = _find_mineru_markdown(output_root, path)
         if not md_files:
             return None
         results: list[PageContent] = []
@@ -302,7 +465,9 @@ def _mineru_extract(path: Path) -> list[PageContent] | None:
             tmp_context.cleanup()
 
 
-def extract_pdf_to_markdown(path: Path, engine: str | None = None) -> tuple[list[PageContent], str]:
+def extract_pdf_to_markdown(
+    path: Path, engine: str | None = None, pdf_workers: int = 1
+) -> tuple[list[PageContent], str]:
     if engine == "mineru":
         mineru = _mineru_extract(path)
         if not mineru:
@@ -310,7 +475,7 @@ def extract_pdf_to_markdown(path: Path, engine: str | None = None) -> tuple[list
         return mineru, "mineru"
 
     if engine == "pypdf":
-        pages = parse_pdf(str(path))
+        pages = parse_pdf(str(path), workers=pdf_workers)
         results: list[PageContent] = []
         for item in pages:
             text = item["text"]
@@ -323,7 +488,7 @@ def extract_pdf_to_markdown(path: Path, engine: str | None = None) -> tuple[list
     if mineru:
         return mineru, "mineru"
 
-    pages = parse_pdf(str(path))
+    pages = parse_pdf(str(path), workers=pdf_workers)
     results: list[PageContent] = []
     for item in pages:
         text = item["text"]
@@ -333,20 +498,38 @@ def extract_pdf_to_markdown(path: Path, engine: str | None = None) -> tuple[list
     return results, "pypdf"
 
 
+@lru_cache(maxsize=4096)
+def _scan_statement_text(text: str) -> tuple[str | None, tuple[str, ...]]:
+    # Keyword hits win over ELR codes, and earlier STATEMENT_KEYWORDS entries win over later ones.
+    found: set[str] = set()
+    elr_codes: list[str] = []
+    for match in STATEMENT_SCAN_RE.finditer(text):
+        code = match.group("elr_code")
+        if code is None:
+            found.add(match.lastgroup)
+            if match.lastgroup == _TOP_STATEMENT:
+                return _TOP_STATEMENT, ()
+        else:
+            elr_codes.append(code.lower())
+    for statement in STATEMENT_KEYWORDS:
+        if statement in found:
+            return statement, ()
+    return None, tuple(elr_codes)
+
+
 def _detect_statement_type(text: str) -> str | None:
-    lowered = text.lower()
-    for statement, keys in STATEMENT_KEYWORDS.items():
-        for key in keys:
-            if key.lower() in lowered:
-                return statement
-    for match in ELR_CODE_RE.finditer(text):
-        code = match.group(1).lower()
+    # Only the scan is cached; ELR codes are mapped here so ELR_STATEMENT_MAP stays live.
+    statement, elr_codes = _scan_statement_text(text)
+    if statement:
+        return statement
+    for code in elr_codes:
         mapped = ELR_STATEMENT_MAP.get(code)
         if mapped:
             return mapped
     return None
 
 
+@lru_cache(maxsize=4096)
 def _detect_units(text: str) -> tuple[str | None, str | None]:
     currency = None
     units = None
@@ -356,6 +539,8 @@ def _detect_units(text: str) -> tuple[str | None, str | None]:
                 currency = currency or cur
             if unit:
                 units = units or unit
+            if currency and units:
+                break
     if units is None:
         match = UNIT_HINT_RE.search(text)
         if match:
@@ -370,16 +555,7 @@ def _detect_units(text: str) -> tuple[str | None, str | None]:
     return currency, units
 
 
-def _extract_fiscal_year(label: str) -> int | None:
-    match = YEAR_RE.search(label)
-    if not match:
-        return None
-    try:
-        return int(match.group(1))
-    except ValueError:
-        return None
-
-
+@lru_cache(maxsize=4096)
 def _parse_date_from_text(text: str) -> date | None:
     match = DATE_RE.search(text)
     if not match:
@@ -391,43 +567,68 @@ def _parse_date_from_text(text: str) -> date | None:
         return None
 
 
+@lru_cache(maxsize=8192)
+def _fast_decimal(raw: str) -> Decimal | None:
+    # Table tokens repeat heavily ("0", "-", "100.00"), so parse each distinct token once.
+    negative = raw[:1] == "(" and raw[-1:] == ")"
+    val_text = raw[1:-1] if negative else raw
+    if "," in val_text:
+        val_text = val_text.replace(",", "")
+    try:
+        val = Decimal(val_text)
+    except (InvalidOperation, ValueError):
+        return None
+    return -val if negative else val
+
+
 def _extract_numbers(line: str) -> list[TableCell]:
-    cells: list[TableCell] = []
-    for match in NUMBER_RE.finditer(line):
-        raw = match.group(0)
-        val_text = raw.replace(",", "")
-        negative = False
-        if val_text.startswith("(") and val_text.endswith(")"):
-            negative = True
-            val_text = val_text[1:-1]
-        try:
-            val = Decimal(val_text)
-            if negative:
-                val = -val
-        except (InvalidOperation, ValueError):
-            val = None
-        cells.append(TableCell(value=val, raw_text=raw))
-    return cells
+    return [TableCell(value=_fast_decimal(raw), raw_text=raw) for raw in NUMBER_RE.findall(line)]
 
 
 def _strip_numbers(line: str) -> str:
-    cleaned = NUMBER_RE.sub(" ", line)
-    cleaned = re.sub(r"\s{2,}", " ", cleaned)
-    return cleaned.strip()
+    return " ".join(NUMBER_RE.sub(" ", line).split())
+
+
+def _tokenize_page(text: str) -> list[tuple[str, str, list[TableCell]]]:
+    """Split text into (stripped line, label, cells) with one NUMBER_RE pass over the whole page.
+
+    For lines with numbers, label and cells equal _strip_numbers(line) and _extract_numbers(line); numbers
+    never span lines. Lines without numbers can never be table rows, so their label is left empty.
+    """
+    matches = NUMBER_RE.finditer(text)
+    match = next(matches, None)
+    tokens: list[tuple[str, str, list[TableCell]]] = []
+    start = 0
+    for piece in text.splitlines(keepends=True):
+        end = start + len(piece)
+        line = piece.strip()
+        if match is None or match.start() >= end:
+            tokens.append((line, "", []))
+            start = end
+            continue
+        parts: list[str] = []
+        cells: list[TableCell] = []
+        prev_end = start
+        while match is not None and match.start() < end:
+            raw = match.group(0)
+            parts.append(text[prev_end : match.start()])
+            cells.append(TableCell(value=_fast_decimal(raw), raw_text=raw))
+            prev_end = match.end()
+            match = next(matches, None)
+        parts.append(text[prev_end:end])
+        tokens.append((line, " ".join(" ".join(parts).split()), cells))
+        start = end
+    return tokens
 
 
 def _html_cell_text(cell_html: str) -> str:
-    cleaned = re.sub(r"<br\\s*/?>", " ", cell_html, flags=re.IGNORECASE)
-    cleaned = re.sub(r"<[^>]+>", " ", cleaned)
-    cleaned = html.unescape(cleaned)
-    cleaned = cleaned.replace("\u00a0", " ")
-    cleaned = re.sub(r"\\s{2,}", " ", cleaned)
-    return cleaned.strip()
+    cleaned = HTML_BR_RE.sub(" ", cell_html)
+    cleaned = HTML_TAG_RE.sub(" ", cleaned)
+    # str.split() also breaks on the U+00A0 that &nbsp; unescapes to.
+    return " ".join(html.unescape(cleaned).split())
 
 
-def _html_cell_spans(cell_html: str) -> tuple[int, int]:
-    open_match = HTML_CELL_OPEN_RE.match(cell_html.strip())
-    attrs = open_match.group(1) if open_match else ""
+def _html_cell_spans(attrs: str) -> tuple[int, int]:
     rowspan = 1
     colspan = 1
     for match in HTML_SPAN_RE.finditer(attrs):
@@ -499,30 +700,15 @@ def _parse_number(text: str) -> Decimal | None:
     match = NUMBER_RE.search(text)
     if not match:
         return None
-    raw = match.group(0)
-    val_text = raw.replace(",", "")
-    negative = False
-    if val_text.startswith("(") and val_text.endswith(")"):
-        negative = True
-        val_text = val_text[1:-1]
-    try:
-        val = Decimal(val_text)
-        if negative:
-            val = -val
-        return val
-    except (InvalidOperation, ValueError):
-        return None
+    return _fast_decimal(match.group(0))
 
 
 def _is_header_row(cells: list[str]) -> bool:
     joined = "".join(cells)
-    if "项目" in joined or "期末" in joined or "期初" in joined or "本期" in joined or "上期" in joined:
-        return True
-    if YEAR_RE.search(joined):
+    if HEADER_ROW_RE.search(joined):
         return True
-    if all(_parse_number(cell) is None for cell in cells):
-        return True
-    return False
+    # _parse_number rather than a bare NUMBER_RE test: tokens such as "(12" match but don't parse.
+    return all(_parse_number(cell) is None for cell in cells if cell)
 
 
 def _extract_last_heading(context: str) -> str | None:
@@ -535,7 +721,6 @@ def _extract_last_heading(context: str) -> str | None:
 def _parse_html_tables(md_text: str, page_number: int) -> list[TableBlock]:
     blocks: list[TableBlock] = []
     for match in HTML_TABLE_RE.finditer(md_text):
-        table_html = match.group(0)
         start = match.start()
         end = match.end()
         context_before = md_text[max(0, start - 1200) : start]
@@ -546,18 +731,13 @@ def _parse_html_tables(md_text: str, page_number: int) -> list[TableBlock]:
         currency, units = _detect_units(context)
         is_consolidated = "合并" in context if context else None
 
-        row_htmls = HTML_ROW_RE.findall(table_html)
-        if not row_htmls:
-            continue
+        # Rows and cells are scanned in place within the match bounds instead of on sliced copies.
         raw_rows: list[list[tuple[str, int, int]]] = []
-        for row_html in row_htmls:
-            cell_htmls = HTML_CELL_RE.findall(row_html)
-            if not cell_htmls:
-                continue
+        for row_match in HTML_ROW_RE.finditer(md_text, start, end):
             cells: list[tuple[str, int, int]] = []
-            for cell_html in cell_htmls:
-                text = _html_cell_text(cell_html)
-                rowspan, colspan = _html_cell_spans(cell_html)
+            for cell_match in HTML_CELL_RE.finditer(md_text, row_match.start(), row_match.end()):
+                text = _html_cell_text(cell_match.group("body"))
+                rowspan, colspan = _html_cell_spans(cell_match.group("attrs"))
                 cells.append((text, rowspan, colspan))
             if any(text for text, _, _ in cells):
                 raw_rows.append(cells)
@@ -595,14 +775,15 @@ def _parse_html_tables(md_text: str, page_number: int) -> list[TableBlock]:
 
         columns: list[TableColumn] = []
         header_text = " ".join(col_labels)
-        header_has_period = bool(YEAR_RE.findall(header_text)) or ("本期" in header_text) or ("上期" in header_text)
+        header_has_period = bool(_scan_periods(header_text)[0]) or ("本期" in header_text) or ("上期" in header_text)
+        context_date = _parse_date_from_text(context)
         for label in col_labels:
-            fiscal_year = _extract_fiscal_year(label)
-            period_end = _parse_date_from_text(label)
+            label_years, period_end = _scan_periods(label)
+            fiscal_year = int(label_years[0]) if label_years else None
             if period_end is None and fiscal_year is not None:
                 period_end = date(fiscal_year, 12, 31)
             if period_end is None:
-                period_end = _parse_date_from_text(context)
+                period_end = context_date
             columns.append(TableColumn(label=label, fiscal_year=fiscal_year, period_end=period_end))
 
         table_rows: list[TableRow] = []
@@ -648,8 +829,13 @@ def _parse_html_tables(md_text: str, page_number: int) -> list[TableBlock]:
 
 def _guess_column_labels(header_lines: list[str], num_cols: int) -> list[TableColumn]:
     header_text = " ".join(header_lines)
-    years = YEAR_RE.findall(header_text)
-    date_match = _parse_date_from_text(header_text)
+    years, date_match = _scan_periods(header_text)
+    return _columns_from_periods(header_text, years, date_match, num_cols)
+
+
+def _columns_from_periods(
+    header_text: str, years: tuple[str, ...], date_match: date | None, num_cols: int
+) -> list[TableColumn]:
     columns: list[TableColumn] = []
 
     labels: list[str] = []
@@ -659,7 +845,7 @@ def _guess_column_labels(header_lines: list[str], num_cols: int) -> list[TableCo
     if "本期" in header_text and "上期" in header_text and num_cols >= 2:
         labels = ["current_period", "prior_period"]
     elif len(years) >= num_cols:
-        labels = years[-num_cols:]
+        labels = list(years[-num_cols:])
     elif len(years) == 1 and num_cols == 2:
         try:
             prior = str(int(years[0]) - 1)
@@ -682,135 +868,115 @@ def _guess_column_labels(header_lines: list[str], num_cols: int) -> list[TableCo
     return columns
 
 
-def _detect_table_blocks(pages: list[PageContent]) -> list[TableBlock]:
-    blocks: list[TableBlock] = []
-
+def _parse_html_pages(html_pages: list[PageContent]) -> list[TableBlock]:
     html_blocks: list[TableBlock] = []
-    for page in pages:
-        if "<table" in page.text_md:
+    workers = min(os.cpu_count() or 1, len(html_pages))
+    if workers > 1 and len(html_pages) >= HTML_PARALLEL_MIN_PAGES:
+        # Pages parse independently; map() keeps the results in page order.
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            texts = [page.text_md for page in html_pages]
+            numbers = [page.page for page in html_pages]
+            for page_blocks in ex.map(_parse_html_tables, texts, numbers):
+                html_blocks.extend(page_blocks)
+    else:
+        for page in html_pages:
             html_blocks.extend(_parse_html_tables(page.text_md, page.page))
-    if html_blocks:
-        return html_blocks
-    header_buffer: list[tuple[int, str]] = []
-    last_statement_header: tuple[int, str] | None = None
+    return html_blocks
 
-    current_rows: list[tuple[int, str]] = []
-    current_header: list[str] = []
-    current_page_start: int | None = None
-    current_page_end: int | None = None
 
-    def flush_current():
-        nonlocal current_rows, current_header, current_page_start, current_page_end
-        if not current_rows:
-            return
-        filtered_rows: list[tuple[int, str]] = []
-        for row_page, line in current_rows:
-            label = _strip_numbers(line)
-            if not label:
-                continue
-            if len(label) > 60:
-                continue
-            if "。" in label or "，" in label:
-                continue
-            if "公司" in label and len(label) > 30:
-                continue
-            filtered_rows.append((row_page, line))
-
-        rows_cells = [_extract_numbers(line) for _, line in filtered_rows]
-        row_labels = [_strip_numbers(line) for _, line in filtered_rows]
-        max_cols = max((len(cells) for cells in rows_cells), default=0)
-        if max_cols == 0:
-            current_rows = []
-            current_header = []
-            current_page_start = None
-            current_page_end = None
-            return
+def _finalize_text_table(
+    rows: list[tuple[int, str, list[TableCell]]], header: list[str], page_start: int, page_end: int
+) -> TableBlock | None:
+    filtered_rows: list[tuple[int, str, list[TableCell]]] = []
+    for row in rows:
+        label = row[1]
+        if not label:
+            continue
+        if len(label) > 60:
+            continue
+        if "。" in label or "，" in label:
+            continue
+        if "公司" in label and len(label) > 30:
+            continue
+        filtered_rows.append(row)
 
-        rows_total = len(rows_cells)
-        rows_with_two = sum(1 for cells in rows_cells if len(cells) >= 2)
-        short_label_rows = sum(1 for label in row_labels if len(label) <= 40)
-        header_text = " ".join(current_header)
-        header_has_period = bool(YEAR_RE.findall(header_text)) or ("本期" in header_text) or ("上期" in header_text)
-        statement_hint = _detect_statement_type(header_text)
-
-        # Basic table quality filters to avoid treating narrative paragraphs as tables.
-        if max_cols < 2 or rows_total < 2:
-            current_rows = []
-            current_header = []
-            current_page_start = None
-            current_page_end = None
-            return
-        if rows_with_two < 2 or rows_with_two / rows_total < 0.5:
-            current_rows = []
-            current_header = []
-            current_page_start = None
-            current_page_end = None
-            return
-        if short_label_rows / rows_total < 0.5:
-            current_rows = []
-            current_header = []
-            current_page_start = None
-            current_page_end = None
-            return
-        if not header_has_period and not statement_hint and rows_total < 5:
-            current_rows = []
-            current_header = []
-            current_page_start = None
-            current_page_end = None
-            return
+    max_cols = max((len(cells) for _, _, cells in filtered_rows), default=0)
+    if max_cols == 0:
+        return None
 
-        columns = _guess_column_labels(current_header, max_cols)
-        table_rows: list[TableRow] = []
-        for (row_page, line), cells in zip(filtered_rows, rows_cells):
-            label = _strip_numbers(line)
-            if not label:
-                label = "(blank)"
-            if len(cells) < max_cols:
-                cells = [TableCell(value=None, raw_text=None)] * (max_cols - len(cells)) + cells
-            table_rows.append(TableRow(label=label, cells=cells, page_number=row_page))
+    rows_total = len(filtered_rows)
+    rows_with_two = sum(1 for _, _, cells in filtered_rows if len(cells) >= 2)
+    short_label_rows = sum(1 for _, label, _ in filtered_rows if len(label) <= 40)
+    header_text = " ".join(header)
+    # One cached period scan serves both the period check and the column labels.
+    years, date_match = _scan_periods(header_text)
+    header_has_period = bool(years) or ("本期" in header_text) or ("上期" in header_text)
+    statement_hint = _detect_statement_type(header_text)
+
+    # Basic table quality filters to avoid treating narrative paragraphs as tables.
+    if max_cols < 2 or rows_total < 2:
+        return None
+    if rows_with_two < 2 or rows_with_two / rows_total < 0.5:
+        return None
+    if short_label_rows / rows_total < 0.5:
+        return None
+    if not header_has_period and not statement_hint and rows_total < 5:
+        return None
 
-        statement_type = statement_hint
-        currency, units = _detect_units(header_text)
-        title = current_header[0] if current_header else None
-        section_title = current_header[-1] if current_header else None
-        is_consolidated = "合并" in header_text if header_text else None
+    columns = _columns_from_periods(header_text, years, date_match, max_cols)
+    table_rows: list[TableRow] = []
+    for row_page, label, cells in filtered_rows:
+        if len(cells) < max_cols:
+            cells = [TableCell(value=None, raw_text=None)] * (max_cols - len(cells)) + cells
+        table_rows.append(TableRow(label=label, cells=cells, page_number=row_page))
+
+    statement_type = statement_hint
+    currency, units = _detect_units(header_text)
+    title = header[0] if header else None
+    section_title = header[-1] if header else None
+    is_consolidated = "合并" in header_text if header_text else None
+
+    if not statement_type:
+        statement_type = infer_statement_type_from_rows(table_rows)
+
+    return TableBlock(
+        title=title,
+        section_title=section_title,
+        statement_type=statement_type,
+        page_start=page_start or 1,
+        page_end=page_end or (page_start or 1),
+        currency=currency,
+        units=units,
+        is_consolidated=is_consolidated,
+        columns=columns,
+        rows=table_rows,
+    )
 
-        if not statement_type:
-            statement_type = infer_statement_type_from_rows(table_rows)
 
-        blocks.append(
-            TableBlock(
-                title=title,
-                section_title=section_title,
-                statement_type=statement_type,
-                page_start=current_page_start or 1,
-                page_end=current_page_end or (current_page_start or 1),
-                currency=currency,
-                units=units,
-                is_consolidated=is_consolidated,
-                columns=columns,
-                rows=table_rows,
-            )
-        )
+def _iter_text_table_blocks(pages: list[PageContent]) -> Iterator[TableBlock]:
+    header_buffer: list[tuple[int, str]] = []
+    last_statement_header: tuple[int, str] | None = None
 
-        current_rows = []
-        current_header = []
-        current_page_start = None
-        current_page_end = None
+    # Each row is (page, label, cells), parsed once when the line is read.
+    current_rows: list[tuple[int, str, list[TableCell]]] = []
+    current_header: list[str] = []
+    current_page_start = 1
+    current_page_end = 1
 
     for page in pages:
-        lines = [line.strip() for line in page.text_raw.splitlines()]
-        for line in lines:
+        for line, label, cells in _tokenize_page(page.text_raw):
             if not line:
                 if current_rows:
-                    flush_current()
+                    block = _finalize_text_table(current_rows, current_header, current_page_start, current_page_end)
+                    if block:
+                        yield block
+                    current_rows = []
                 continue
 
             if _detect_statement_type(line):
                 last_statement_header = (page.page, line)
 
-            cells = _extract_numbers(line)
-            has_label = bool(_strip_numbers(line))
+            has_label = bool(label)
             if not current_rows:
                 is_row = len(cells) >= 2 and has_label
             else:
@@ -823,19 +989,50 @@ def _detect_table_blocks(pages: list[PageContent]) -> list[TableBlock]:
                             if last_statement_header[1] not in current_header:
                                 current_header = [last_statement_header[1]] + current_header
                     current_page_start = page.page
-                current_rows.append((page.page, line))
+                current_rows.append((page.page, label, cells))
                 current_page_end = page.page
             else:
                 if current_rows:
-                    flush_current()
+                    block = _finalize_text_table(current_rows, current_header, current_page_start, current_page_end)
+                    if block:
+                        yield block
+                    current_rows = []
                 header_buffer.append((page.page, line))
                 if len(header_buffer) > 3:
                     header_buffer.pop(0)
 
     if current_rows:
-        flush_current()
+        block = _finalize_text_table(current_rows, current_header, current_page_start, current_page_end)
+        if block:
+            yield block
 
-    return blocks
+
+def _detect_table_blocks(pages: list[PageContent]) -> list[TableBlock]:
+    # MinerU HTML tables take precedence; the text state machine only runs when none parse.
+    html_pages = [page for page in pages if "<table" in page.text_md]
+    if html_pages:
+        html_blocks = _parse_html_pages(html_pages)
+        if html_blocks:
+            return html_blocks
+    return list(_iter_text_table_blocks(pages))
+
+
+@lru_cache(maxsize=4096)
+def _scan_periods(text: str) -> tuple[tuple[str, ...], date | None]:
+    years: list[str] = []
+    first_date = None
+    date_seen = False
+    for match in PERIOD_RE.finditer(text):
+        year, month, day = match.groups()
+        years.append(year)
+        if month is not None and not date_seen:
+            # Like _parse_date_from_text, only the first date-shaped match counts, valid or not.
+            date_seen = True
+            try:
+                first_date = date(int(year), int(month), int(day))
+            except ValueError:
+                first_date = None
+    return tuple(years), first_date
 
 
 def _extract_metadata(pages: list[PageContent]) -> ReportMeta:
@@ -849,24 +1046,32 @@ def _extract_metadata(pages: list[PageContent]) -> ReportMeta:
     period_end = None
     currency, units = _detect_units(head_text)
 
-    for line in head_text.splitlines():
-        if not report_title and ("年度报告" in line or "年报" in line or "annual report" in line.lower()):
-            report_title = line.strip()
-        if not company_name and "公司名称" in line:
-            company_name = line.split("：", 1)[-1].strip()
-        if not ticker and ("股票代码" in line or "证券代码" in line):
+    # Visit only lines that contain a metadata keyword instead of testing every keyword on every line.
+    lines = head_text.splitlines(keepends=True)
+    line_ends = list(accumulate(len(line) for line in lines))
+    for match in METADATA_KEYWORD_RE.finditer(head_text):
+        line = lines[bisect_right(line_ends, match.start())]
+        kind = match.lastgroup
+        if kind == "title":
+            if not report_title:
+                report_title = line.strip()
+            if not report_type and match.group(0) in ("年度报告", "年报"):
+                report_type = "annual"
+        elif kind == "company":
+            if not company_name:
+                company_name = line.split("：", 1)[-1].strip()
+        elif not ticker:
             ticker = line.split("：", 1)[-1].strip()
-        if not report_type and ("年度报告" in line or "年报" in line):
-            report_type = "annual"
+        if report_title and report_type and company_name and ticker:
+            break
 
-    years = YEAR_RE.findall(head_text)
+    years, date_match = _scan_periods(head_text)
     if years:
         try:
             fiscal_year = int(years[0])
         except ValueError:
             fiscal_year = None
 
-    date_match = _parse_date_from_text(head_text)
     if date_match:
         period_end = date_match
     elif fiscal_year and report_type == "annual":
@@ -887,9 +1092,48 @@ def _extract_metadata(pages: list[PageContent]) -> ReportMeta:
     )
 
 
-def extract_financial_report(path: str, engine: str | None = None) -> tuple[list[PageContent], ReportMeta, list[TableBlock], str]:
+def _report_cache_path(pdf_path: Path, engine: str | None, source_hash: str | None) -> Path | None:
+    # Entries are loaded with pickle.load, so REPORT_PARSE_CACHE_DIR must only be writable by trusted users.
+    cache_dir = os.getenv("REPORT_PARSE_CACHE_DIR")
+    if not cache_dir:
+        return None
+    key = source_hash or sha256_file(pdf_path)
+    engine_key = engine or "auto"
+    backend = pdf_text_backend()
+    if backend != "pypdf":
+        engine_key = f"{engine_key}-{backend}"
+    return Path(cache_dir) / f"{key}-{engine_key}-v{REPORT_CACHE_VERSION}.pkl"
+
+
+def extract_financial_report(
+    path: str, engine: str | None = None, source_hash: str | None = None, pdf_workers: int = 1
+) -> tuple[list[PageContent], ReportMeta, list[TableBlock], str]:
     pdf_path = Path(path)
-    pages, parse_method = extract_pdf_to_markdown(pdf_path, engine=engine)
+    cache_path = _report_cache_path(pdf_path, engine, source_hash)
+    if cache_path and cache_path.exists():
+        try:
+            with cache_path.open("rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, AttributeError, pickle.UnpicklingError):
+            pass
+
+    pages, parse_method = extract_pdf_to_markdown(pdf_path, engine=engine, pdf_workers=pdf_workers)
     meta = _extract_metadata(pages)
     tables = _detect_table_blocks(pages)
-    return pages, meta, tables, parse_method
+    result = (pages, meta, tables, parse_method)
+
+    # An automatic run that fell back to pypdf may only mean MinerU was briefly unavailable; don't pin it.
+    if cache_path and (engine or parse_method == "mineru"):
+        tmp_path = None
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # A unique temp file per writer: concurrent ingests of the same PDF must not share one.
+            with tempfile.NamedTemporaryFile(dir=cache_path.parent, suffix=".tmp", delete=False) as f:
+                tmp_path = Path(f.name)
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(cache_path)
+        except OSError:
+            # The cache only saves time; a full or read-only cache dir must not fail the ingest.
+            if tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
+    return result
@@ -3,14 +3,30 @@ from __future__ import annotations
 import argparse
 import hashlib
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
+from typing import Iterator
+
+import ijson
+import numpy as np
+import orjson
 
 from app.chunking.index import chunk_text
-from app.ingest.embedding_client import embed_texts
-from app.retrieval.milvus_client import insert_chunks
+from app.config import get_settings
 from app.storage.repository import upsert_document, get_document_by_hash, upsert_finqa_qa
 
 
+# Items whose chunks share one embedding request and one Milvus flush.
+FINQA_BATCH_ITEMS = 64
+# Postgres calls are per-item round trips with a connection each, so they run on threads.
+FINQA_IO_THREADS = 8
+
+# (item, item_id, doc_text, file_hash)
+PreparedItem = tuple[dict, str, str, str]
+
+
 def index_finqa(dataset_path: str) -> dict:
     base = Path(dataset_path)
     if not base.exists():
@@ -20,80 +36,201 @@ def index_finqa(dataset_path: str) -> dict:
     if not json_files:
         return {"indexed": 0, "skipped": 0, "errors": [f"No .json files under: {dataset_path}"]}
 
+    settings = get_settings()
+    workers = max(1, settings.ingest_workers)
     indexed = 0
     skipped = 0
     errors: list[str] = []
+    # FinQA repeats one filing's text across its QA pairs; claim each document once per run.
+    claimed: set[str] = set()
 
-    for json_path in json_files:
-        try:
-            items = _load_json_any(json_path)
-            for item in items:
-                try:
-                    doc_text = _assemble_doc_text(item)
-                    if not doc_text:
+    with ExitStack() as stack:
+        cpu_pool = None
+        if workers > 1:
+            # Pool processes start on first submit, while IO threads may hold locks; fork would copy them held.
+            spawn = multiprocessing.get_context("spawn")
+            cpu_pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers, mp_context=spawn))
+        io_pool = stack.enter_context(ThreadPoolExecutor(max_workers=FINQA_IO_THREADS))
+        for json_path in json_files:
+            batch: list[PreparedItem] = []
+            try:
+                for item in _load_json_any(json_path):
+                    try:
+                        doc_text = _assemble_doc_text(item)
+                        if not doc_text:
+                            continue
+                        file_hash = _hash_text(doc_text)
+                        item_id = str(item.get("id") or item.get("uid") or file_hash[:12])
+                    except Exception as exc:
+                        errors.append(f"{json_path} item failed: {exc}")
                         continue
-
-                    file_hash = _hash_text(doc_text)
-                    existing = get_document_by_hash(file_hash)
-                    if existing:
+                    if file_hash in claimed:
                         skipped += 1
                         continue
+                    claimed.add(file_hash)
+                    batch.append((item, item_id, doc_text, file_hash))
+                    if len(batch) >= FINQA_BATCH_ITEMS:
+                        batch_indexed, batch_skipped = _index_batch(json_path, batch, claimed, errors, io_pool, cpu_pool)
+                        indexed += batch_indexed
+                        skipped += batch_skipped
+                        batch = []
+            except Exception as exc:
+                errors.append(f"{json_path} failed: {exc}")
+            if batch:
+                batch_indexed, batch_skipped = _index_batch(json_path, batch, claimed, errors, io_pool, cpu_pool)
+                indexed += batch_indexed
+                skipped += batch_skipped
+
+    return {"indexed": indexed, "skipped": skipped, "errors": errors}
+
+
+def _index_batch(
+    json_path: Path,
+    batch: list[PreparedItem],
+    claimed: set[str],
+    errors: list[str],
+    io_pool: ThreadPoolExecutor,
+    cpu_pool: ProcessPoolExecutor | None,
+) -> tuple[int, int]:
+    """Index one batch of items from json_path and return (indexed, skipped); failures are per item.
 
-                    item_id = str(item.get("id") or item.get("uid") or file_hash[:12])
-                    doc_id = file_hash[:32]
-                    source_path = f"finqa::{json_path.name}::{item_id}"
-
-                    upsert_document(doc_id, source_path, file_hash, "processing", 0)
-                    _store_qa(item, item_id, doc_id)
-
-                    chunks = []
-                    for idx, chunk in enumerate(chunk_text(doc_text)):
-                        chunks.append(
-                            {
-                                "text": chunk,
-                                "page": 0,
-                                "chunk_index": idx,
-                                "doc_id": doc_id,
-                                "source_path": source_path,
-                            }
-                        )
-
-                    embeddings = embed_texts([c["text"] for c in chunks])
-                    for i, emb in enumerate(embeddings):
-                        chunks[i]["embedding"] = emb
-
-                    insert_chunks(chunks)
-                    upsert_document(doc_id, source_path, file_hash, "indexed", len(chunks))
-                    indexed += 1
-                except Exception as exc:
-                    errors.append(f"{json_path} item failed: {exc}")
+    Items that fail before their document row exists release their claim so a later duplicate can retry.
+    """
+    # pymilvus and the HTTP client load only once a batch exists, not for an empty or fully indexed dataset.
+    from app.ingest.embedding_client import embed_texts
+    from app.retrieval.milvus_client import flush_collection, insert_chunk_columns
+
+    settings = get_settings()
+
+    def _failed(entry: PreparedItem, exc: BaseException) -> None:
+        errors.append(f"{json_path} item {entry[1]} failed: {exc}")
+
+    skipped = 0
+    fresh: list[PreparedItem] = []
+    lookups = [io_pool.submit(get_document_by_hash, entry[3]) for entry in batch]
+    for entry, lookup in zip(batch, lookups):
+        try:
+            existing = lookup.result()
         except Exception as exc:
-            errors.append(f"{json_path} failed: {exc}")
+            claimed.discard(entry[3])
+            _failed(entry, exc)
+            continue
+        if existing:
+            skipped += 1
+            continue
+        fresh.append(entry)
 
-    return {"indexed": indexed, "skipped": skipped, "errors": errors}
+    started: list[PreparedItem] = []
+    starts = [io_pool.submit(_start_item, json_path, entry) for entry in fresh]
+    for entry, future in zip(fresh, starts):
+        try:
+            future.result()
+        except Exception as exc:
+            claimed.discard(entry[3])
+            _failed(entry, exc)
+            continue
+        started.append(entry)
 
+    # Tokenizing is the CPU-bound step; fan it out over processes when workers allow.
+    chunked: list[tuple[PreparedItem, list[str]]] = []
+    futures = [cpu_pool.submit(chunk_text, entry[2]) for entry in started] if cpu_pool is not None else None
+    for i, entry in enumerate(started):
+        try:
+            chunked.append((entry, futures[i].result() if futures is not None else chunk_text(entry[2])))
+        except Exception as exc:
+            _failed(entry, exc)
+    if not chunked:
+        return 0, skipped
 
-def _hash_text(text: str) -> str:
-    sha = hashlib.sha256()
-    sha.update(text.encode("utf-8"))
-    return sha.hexdigest()
-
-
-def _load_json_any(path: Path) -> list[dict]:
-    raw = path.read_text(encoding="utf-8")
-    raw = raw.strip()
-    if not raw:
-        return []
-    if raw.startswith("["):
-        return json.loads(raw)
-    # JSONL fallback
-    items = []
-    for line in raw.splitlines():
-        line = line.strip()
-        if not line:
+    all_texts = [text for _, texts in chunked for text in texts]
+    try:
+        embeddings = embed_texts(
+            all_texts, out=np.empty((len(all_texts), settings.embedding_dim), dtype=np.float32)
+        )
+    except Exception as exc:
+        for entry, _ in chunked:
+            _failed(entry, exc)
+        return 0, skipped
+
+    inserted: list[tuple[PreparedItem, int]] = []
+    offset = 0
+    for entry, texts in chunked:
+        count = len(texts)
+        try:
+            insert_chunk_columns(
+                entry[3][:32],
+                _source_path(json_path, entry),
+                [0] * count,
+                list(range(count)),
+                texts,
+                embeddings[offset : offset + count],
+                flush=False,
+            )
+            inserted.append((entry, count))
+        except Exception as exc:
+            _failed(entry, exc)
+        offset += count
+    if not inserted:
+        return 0, skipped
+    try:
+        flush_collection()
+    except Exception as exc:
+        for entry, _ in inserted:
+            _failed(entry, exc)
+        return 0, skipped
+
+    indexed = 0
+    finishes = [
+        io_pool.submit(
+            upsert_document, entry[3][:32], _source_path(json_path, entry), entry[3], "indexed", count
+        )
+        for entry, count in inserted
+    ]
+    for (entry, _), future in zip(inserted, finishes):
+        try:
+            future.result()
+        except Exception as exc:
+            _failed(entry, exc)
             continue
-        items.append(json.loads(line))
-    return items
+        indexed += 1
+    return indexed, skipped
+
+
+def _source_path(json_path: Path, entry: PreparedItem) -> str:
+    return f"finqa::{json_path.name}::{entry[1]}"
+
+
+def _start_item(json_path: Path, entry: PreparedItem) -> None:
+    item, item_id, _, file_hash = entry
+    doc_id = file_hash[:32]
+    upsert_document(doc_id, _source_path(json_path, entry), file_hash, "processing", 0)
+    _store_qa(item, item_id, doc_id)
+
+
+def _hash_text(text: str) -> str:
+    # Persisted as documents.file_hash and the doc_id prefix, so the algorithm must not change.
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _load_json_any(path: Path) -> Iterator[dict]:
+    # Items are streamed so a large FinQA dump is never fully materialized.
+    with path.open("rb") as f:
+        first = b""
+        while not first:
+            block = f.read(4096)
+            if not block:
+                return
+            first = block.lstrip()
+        f.seek(0)
+        if first.startswith(b"["):
+            yield from ijson.items(f, "item", use_float=True)
+            return
+        # JSONL fallback
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            yield orjson.loads(line)
 
 
 def _assemble_doc_text(item: dict) -> str:
@@ -145,7 +282,7 @@ def _store_qa(item: dict, qa_id: str, doc_id: str) -> None:
         or item.get("a")
         or None
     )
-    raw_json = json.dumps(item, ensure_ascii=False)
+    raw_json = orjson.dumps(item).decode("utf-8")
     if question:
         upsert_finqa_qa(qa_id=qa_id, doc_id=doc_id, question=question, answer=answer, raw_json=raw_json)
 
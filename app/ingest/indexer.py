@@ -2,29 +2,37 @@ from __future__ import annotations
 
 import hashlib
 import logging
-import math
+import multiprocessing
 import os
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import chain, islice
 from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
 
 from app.chunking.index import chunk_text
 from app.config import get_settings
-from app.ingest.embedding_client import embed_texts
-from app.ingest.parser_pdf import parse_pdf
-from app.ingest.parser_docx import parse_docx
-from app.retrieval.milvus_client import insert_chunks, flush_collection
 from app.storage.repository import upsert_document, get_document_by_hash, mark_document_status
 
 
 SUPPORTED_EXTENSIONS = {".pdf", ".docx"}
+# Chunks buffered across files before one embedding call; a single larger file is embedded on its own.
+EMBED_BUFFER_CHUNKS = 512
+MILVUS_INSERT_THREADS = 2
 _LOGGER = logging.getLogger("ingest")
 
 
 def _file_hash(path: Path) -> str:
-    sha = hashlib.sha256()
     with path.open("rb") as f:
-        for block in iter(lambda: f.read(8192), b""):
-            sha.update(block)
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        sha = hashlib.sha256()
+        buf = bytearray(4 * 1024 * 1024)
+        view = memoryview(buf)
+        while size := f.readinto(buf):
+            sha.update(view[:size])
     return sha.hexdigest()
 
 
@@ -41,100 +49,219 @@ def index_directory(path: str) -> dict:
     skipped = 0
     errors: list[str] = []
 
-    for file_path in base.rglob("*"):
-        if not file_path.is_file():
-            continue
-        if file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
-            continue
-
-        doc_id = None
-        try:
-            file_start = time.perf_counter()
-            _LOGGER.info("Indexing file: %s", file_path)
-            file_hash = _file_hash(file_path)
-            doc_id = file_hash[:32]
-            existing = get_document_by_hash(file_hash)
-            if existing and existing.get("status") == "indexed":
-                _LOGGER.info("Skip (already indexed): %s", file_path)
-                skipped += 1
+    def _iter_to_parse() -> Iterator[tuple[Path, str, str, float]]:
+        # Hashed lazily, so the first files are already parsing while later ones are still being hashed.
+        nonlocal skipped
+        for file_path in base.rglob("*"):
+            if not file_path.is_file():
+                continue
+            if file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
                 continue
-            if existing:
-                _LOGGER.info("Reindexing file with previous status=%s: %s", existing.get("status"), file_path)
 
-            upsert_document(doc_id, str(file_path), file_hash, "processing", 0)
+            doc_id = None
+            try:
+                file_start = time.perf_counter()
+                _LOGGER.info("Indexing file: %s", file_path)
+                file_hash = _file_hash(file_path)
+                doc_id = file_hash[:32]
+                existing = get_document_by_hash(file_hash)
+                if existing and existing.get("status") == "indexed":
+                    _LOGGER.info("Skip (already indexed): %s", file_path)
+                    skipped += 1
+                    continue
+                if existing:
+                    _LOGGER.info("Reindexing file with previous status=%s: %s", existing.get("status"), file_path)
 
-            chunks = _extract_chunks(file_path)
-            if not chunks:
-                mark_document_status(doc_id, "empty")
-                _LOGGER.info("No chunks extracted: %s", file_path)
+                upsert_document(doc_id, str(file_path), file_hash, "processing", 0)
+            except Exception as exc:
+                errors.append(f"{file_path}: {exc}")
+                if doc_id:
+                    mark_document_status(doc_id, "failed")
+                _LOGGER.exception("Failed indexing %s", file_path)
                 continue
+            yield file_path, file_hash, doc_id, file_start
 
-            for chunk in chunks:
-                chunk["doc_id"] = doc_id
-                chunk["source_path"] = str(file_path)
+    workers = max(1, settings.ingest_workers)
+    pending: list[tuple[tuple[Path, str, str, float], dict[str, list]]] = []
+    pending_chunks = 0
+    # One embed+insert group runs in the background while the next one is parsed and buffered.
+    with ThreadPoolExecutor(max_workers=1) as embed_pool:
+        embedding: Future | None = None
+        for item, chunks, parse_error in _iter_extracted(_iter_to_parse(), workers):
+            file_path, _, doc_id, _ = item
+            try:
+                if parse_error is not None:
+                    raise parse_error
+                if not chunks["text"]:
+                    mark_document_status(doc_id, "empty")
+                    _LOGGER.info("No chunks extracted: %s", file_path)
+                    continue
+                _LOGGER.info("Extracted %d chunks: %s", len(chunks["text"]), file_path)
+            except Exception as exc:
+                errors.append(f"{file_path}: {exc}")
+                mark_document_status(doc_id, "failed")
+                _LOGGER.exception("Failed indexing %s", file_path)
+                continue
 
-            _LOGGER.info("Extracted %d chunks. Embedding...", len(chunks))
-            embed_start = time.perf_counter()
-            embeddings = embed_texts([c["text"] for c in chunks])
-            _LOGGER.info("Embedding done in %.2fs", time.perf_counter() - embed_start)
+            # Small files share embedding requests; flush once enough chunks are buffered.
+            pending.append((item, chunks))
+            pending_chunks += len(chunks["text"])
+            if pending_chunks >= EMBED_BUFFER_CHUNKS:
+                if embedding is not None:
+                    indexed += embedding.result()
+                embedding = embed_pool.submit(_embed_and_insert, pending, errors)
+                pending = []
+                pending_chunks = 0
+        if embedding is not None:
+            indexed += embedding.result()
+    if pending:
+        indexed += _embed_and_insert(pending, errors)
 
-            if len(embeddings) != len(chunks):
-                raise RuntimeError(
-                    f"Embedding count mismatch: {len(embeddings)} vs {len(chunks)}"
-                )
-            for i, emb in enumerate(embeddings):
-                chunks[i]["embedding"] = emb
-
-            batch_size = max(1, settings.milvus_insert_batch)
-            total_batches = math.ceil(len(chunks) / batch_size)
-            for b in range(0, len(chunks), batch_size):
-                batch = chunks[b : b + batch_size]
-                insert_chunks(batch, flush=False)
-                _LOGGER.info(
-                    "Inserted batch %d/%d (size=%d)",
-                    (b // batch_size) + 1,
-                    total_batches,
-                    len(batch),
-                )
-            flush_collection()
-            upsert_document(doc_id, str(file_path), file_hash, "indexed", len(chunks))
-            indexed += 1
-            _LOGGER.info(
-                "Indexed %s in %.2fs",
-                file_path,
-                time.perf_counter() - file_start,
-            )
-        except Exception as exc:
+    return {"indexed": indexed, "skipped": skipped, "errors": errors}
+
+
+def _embed_and_insert(
+    pending: list[tuple[tuple[Path, str, str, float], dict[str, list]]], errors: list[str]
+) -> int:
+    # pymilvus and the HTTP client load only once there is something to embed.
+    from app.ingest.embedding_client import embed_texts
+    from app.retrieval.milvus_client import flush_collection, insert_chunk_columns
+
+    settings = get_settings()
+    texts = [text for _, chunks in pending for text in chunks["text"]]
+    try:
+        _LOGGER.info("Embedding %d chunks from %d files...", len(texts), len(pending))
+        embed_start = time.perf_counter()
+        embeddings = embed_texts(texts, out=np.empty((len(texts), settings.embedding_dim), dtype=np.float32))
+        _LOGGER.info("Embedding done in %.2fs", time.perf_counter() - embed_start)
+    except Exception as exc:
+        for (file_path, _, doc_id, _), _ in pending:
             errors.append(f"{file_path}: {exc}")
-            if doc_id:
+            mark_document_status(doc_id, "failed")
+        _LOGGER.exception("Failed embedding %d files", len(pending))
+        return 0
+
+    inserted: list[tuple[Path, str, str, float, int]] = []
+    offset = 0
+    batch_size = max(1, settings.milvus_insert_batch)
+    # Inserts are network-bound; keep a few in flight and flush once after all of them.
+    with ThreadPoolExecutor(max_workers=MILVUS_INSERT_THREADS) as insert_pool:
+        submitted: list[tuple[tuple[Path, str, str, float], int, list[Future]]] = []
+        for item, chunks in pending:
+            file_path, _, doc_id, _ = item
+            count = len(chunks["text"])
+            vectors = embeddings[offset : offset + count]
+            offset += count
+            futures = [
+                insert_pool.submit(
+                    insert_chunk_columns,
+                    doc_id,
+                    str(file_path),
+                    chunks["page"][b : b + batch_size],
+                    chunks["chunk_index"][b : b + batch_size],
+                    chunks["text"][b : b + batch_size],
+                    vectors[b : b + batch_size],
+                    flush=False,
+                )
+                for b in range(0, count, batch_size)
+            ]
+            submitted.append((item, count, futures))
+
+        for (file_path, file_hash, doc_id, file_start), count, futures in submitted:
+            try:
+                for n, future in enumerate(futures, start=1):
+                    future.result()
+                    _LOGGER.info(
+                        "Inserted batch %d/%d (size=%d)",
+                        n,
+                        len(futures),
+                        min(batch_size, count - (n - 1) * batch_size),
+                    )
+                inserted.append((file_path, file_hash, doc_id, file_start, count))
+            except Exception as exc:
+                errors.append(f"{file_path}: {exc}")
                 mark_document_status(doc_id, "failed")
-            _LOGGER.exception("Failed indexing %s", file_path)
+                _LOGGER.exception("Failed indexing %s", file_path)
+
+    if not inserted:
+        return 0
+    try:
+        flush_collection()
+    except Exception as exc:
+        for file_path, _, doc_id, _, _ in inserted:
+            errors.append(f"{file_path}: {exc}")
+            mark_document_status(doc_id, "failed")
+        _LOGGER.exception("Failed flushing Milvus collection")
+        return 0
+    for file_path, file_hash, doc_id, file_start, chunk_count in inserted:
+        upsert_document(doc_id, str(file_path), file_hash, "indexed", chunk_count)
+        _LOGGER.info(
+            "Indexed %s in %.2fs",
+            file_path,
+            time.perf_counter() - file_start,
+        )
+    return len(inserted)
 
-    return {"indexed": indexed, "skipped": skipped, "errors": errors}
 
+def _iter_extracted(
+    items: Iterable[tuple[Path, str, str, float]], workers: int
+) -> Iterator[tuple[tuple[Path, str, str, float], dict[str, list] | None, BaseException | None]]:
+    """Yield (item, chunks, error) per file, parsing in a process pool when workers > 1.
 
-def _extract_chunks(file_path: Path) -> list[dict]:
+    items is consumed lazily. Embedding and Milvus inserts stay with the caller, so they overlap with parsing
+    of later files.
+    """
+    queue = iter(items)
+    head = list(islice(queue, 2))
+    if workers <= 1 or len(head) <= 1:
+        for item in chain(head, queue):
+            try:
+                yield item, _extract_chunks(item[0]), None
+            except Exception as exc:
+                yield item, None, exc
+        return
+
+    queue = chain(head, queue)
+    # Spawn, not fork: this runs from the /index route, where other request threads may hold locks.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as ex:
+        # At most two parses per worker in flight, so parsed text for a large directory isn't all held at once.
+        inflight: dict[Future, tuple[Path, str, str, float]] = {}
+        for item in islice(queue, workers * 2):
+            inflight[ex.submit(_extract_chunks, item[0])] = item
+        while inflight:
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = inflight.pop(future)
+                for next_item in islice(queue, 1):
+                    inflight[ex.submit(_extract_chunks, next_item[0])] = next_item
+                error = future.exception()
+                yield item, None if error else future.result(), error
+
+
+def _extract_chunks(file_path: Path) -> dict[str, list]:
     if file_path.suffix.lower() == ".pdf":
+        from app.ingest.parser_pdf import parse_pdf
+
         parts = parse_pdf(str(file_path))
         _LOGGER.info("Parsed PDF pages: %d", len(parts))
         return _chunks_from_parts(parts, page_key="page")
     if file_path.suffix.lower() == ".docx":
+        from app.ingest.parser_docx import parse_docx
+
         parts = parse_docx(str(file_path))
         _LOGGER.info("Parsed DOCX paragraphs: %d", len(parts))
         return _chunks_from_parts(parts, page_key="paragraph")
-    return []
+    return _chunks_from_parts([], page_key="page")
 
 
-def _chunks_from_parts(parts: list[dict], page_key: str) -> list[dict]:
-    chunks: list[dict] = []
+def _chunks_from_parts(parts: list[dict], page_key: str) -> dict[str, list]:
+    """Chunk parsed parts into parallel "text", "page" and "chunk_index" columns."""
+    texts: list[str] = []
+    pages: list[int] = []
+    chunk_indices: list[int] = []
     for part in parts:
-        text = part.get("text", "")
-        for idx, chunk in enumerate(chunk_text(text)):
-            chunks.append(
-                {
-                    "text": chunk,
-                    "page": int(part.get(page_key, 0)),
-                    "chunk_index": idx,
-                }
-            )
-    return chunks
+        part_chunks = chunk_text(part.get("text", ""))
+        texts.extend(part_chunks)
+        pages.extend([int(part.get(page_key, 0))] * len(part_chunks))
+        chunk_indices.extend(range(len(part_chunks)))
+    return {"text": texts, "page": pages, "chunk_index": chunk_indices}
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 import hashlib
-import json
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 import re
+import sys
+
+import orjson
 
 
 SHORT_PATTERN_MAX = 2
@@ -21,6 +25,8 @@ LEADING_PREFIX_RE = re.compile(r"^\s*其中\s*[：:]\s*")
 PAREN_ANNOTATION_RE = re.compile(
     r"[（(][^（）()]{0,64}(?:净亏损以|亏损以|损失以|收益以|号填列|填列)[^（）()]{0,64}[）)]"
 )
+# Whitespace and punctuation are both deleted outright, so one character class removes them in a single pass.
+LABEL_STRIP_RE = re.compile(r"[\s\u3000：:（）()，,．.。;；、_\-—－/\\“”\"'‘’`]+")
 
 
 def _normalize_label_impl(label: str) -> str:
@@ -28,8 +34,7 @@ def _normalize_label_impl(label: str) -> str:
     cleaned = LEADING_ENUM_RE.sub("", cleaned)
     cleaned = LEADING_PREFIX_RE.sub("", cleaned)
     cleaned = PAREN_ANNOTATION_RE.sub("", cleaned)
-    cleaned = re.sub(r"[\s\u3000]+", "", cleaned)
-    cleaned = re.sub(r"[：:（）()，,．.。;；、_\-—－/\\“”\"'‘’`]+", "", cleaned)
+    cleaned = LABEL_STRIP_RE.sub("", cleaned)
     return cleaned.lower()
 
 
@@ -1085,8 +1090,8 @@ def _load_dictionary_file(path: Path) -> list[dict] | None:
     if not path.exists():
         return None
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except (OSError, json.JSONDecodeError):
+        data = orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
         return None
 
     if isinstance(data, dict):
@@ -1200,7 +1205,9 @@ def _merge_metric_defs(base_defs: list[dict], loaded_defs: list[dict] | None) ->
 METRIC_DEFS = _merge_metric_defs(BASE_METRIC_DEFS, _load_dictionary_file(DICTIONARY_PATH))
 
 
+@lru_cache(maxsize=8192)
 def normalize_label(label: str) -> str:
+    # Row labels and dictionary patterns repeat across every matcher pass; _normalize_label_impl is uncached.
     return _normalize_label_impl(label)
 
 
@@ -1208,8 +1215,8 @@ def _load_cas2020_mapping(path: Path) -> dict[str, dict[str, list[str] | str]] |
     if not path.exists():
         return None
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except (OSError, json.JSONDecodeError):
+        data = orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
         return None
     records = data.get("records") if isinstance(data, dict) else None
     if not isinstance(records, list):
@@ -1268,9 +1275,25 @@ def metric_name_en_from_code(metric_code: str) -> str:
     return metric_code.replace("_", " ").title()
 
 
+_METRIC_DICTIONARIES: dict[bool, tuple[list[dict], list[dict]]] = {}
+
+
 def get_metric_dictionary(use_base: bool = False) -> list[dict]:
-    dictionary: list[dict] = []
+    """Public view of the metric definitions.
+
+    The list is built once per definitions list and shared between callers, so copy it before mutating.
+    """
     source = BASE_METRIC_DEFS if use_base else METRIC_DEFS
+    cached = _METRIC_DICTIONARIES.get(use_base)
+    if cached is not None and cached[0] is source:
+        return cached[1]
+    dictionary = _build_metric_dictionary(source)
+    _METRIC_DICTIONARIES[use_base] = (source, dictionary)
+    return dictionary
+
+
+def _build_metric_dictionary(source: list[dict]) -> list[dict]:
+    dictionary: list[dict] = []
     for metric in source:
         metric_name_en = metric.get("metric_name_en") or metric_name_en_from_code(metric["metric_code"])
         dictionary.append(
@@ -1290,22 +1313,96 @@ def get_metric_dictionary(use_base: bool = False) -> list[dict]:
     return dictionary
 
 
+@lru_cache(maxsize=8192)
 def metric_code_from_label(label: str, statement_type: str) -> str:
     norm = normalize_label(label)
+    # Codes are persisted on statement facts, so the hash must stay SHA-1.
     digest = hashlib.sha1(f"{statement_type}:{norm}".encode("utf-8")).hexdigest()[:12]
     return f"raw_{digest}"
 
 
-def _metric_patterns(metric: dict) -> list[str]:
-    patterns = list(metric.get("patterns", []))
-    patterns += list(metric.get("patterns_en", []))
-    return patterns
-
-
-def _metric_exact_patterns(metric: dict) -> set[str]:
-    patterns = set(metric.get("patterns_exact", []))
-    patterns.update(metric.get("patterns_en_exact", []))
-    return {normalize_label(pattern) for pattern in patterns}
+def _metric_patterns(metric: dict) -> tuple[str, ...]:
+    """Normalized loose patterns (CN then EN), computed once per metric and stored on it."""
+    norm_patterns = metric.get("_norm_patterns")
+    if norm_patterns is None:
+        patterns = list(metric.get("patterns", [])) + list(metric.get("patterns_en", []))
+        norm_patterns = tuple(norm for norm in map(normalize_label, patterns) if norm)
+        metric["_norm_patterns"] = norm_patterns
+    return norm_patterns
+
+
+def _metric_exact_patterns(metric: dict) -> frozenset[str]:
+    """Normalized exact patterns (CN and EN), computed once per metric and stored on it."""
+    norm_exact = metric.get("_norm_exact")
+    if norm_exact is None:
+        patterns = list(metric.get("patterns_exact", [])) + list(metric.get("patterns_en_exact", []))
+        norm_exact = frozenset(map(normalize_label, patterns))
+        metric["_norm_exact"] = norm_exact
+    return norm_exact
+
+
+def _prime_metric_defs(metric_defs: list[dict]) -> None:
+    # Normalize every dictionary pattern up front so matching never renormalizes them, and intern the
+    # small type vocabularies so comparisons against literals such as "ratio" hit the identity fast path.
+    for metric in metric_defs:
+        metric["statement_type"] = sys.intern(metric["statement_type"])
+        metric["value_nature"] = sys.intern(metric["value_nature"])
+        _metric_patterns(metric)
+        _metric_exact_patterns(metric)
+
+
+_prime_metric_defs(METRIC_DEFS)
+
+
+@dataclass(slots=True)
+class _MetricIndex:
+    source: list[dict]
+    by_type: dict[str, list[dict]]
+    # (statement_type, normalized exact pattern) -> [(position in by_type bucket, metric)] in dictionary order.
+    exact: dict[tuple[str, str], list[tuple[int, dict]]]
+    # (statement_type, normalized loose pattern) -> [(position in by_type bucket, metric)] in dictionary order.
+    loose: dict[tuple[str, str], list[tuple[int, dict]]]
+    # Normalized CN loose pattern -> {statement_type: number of metric patterns normalizing to it}.
+    row_hints: dict[str, dict[str, int]]
+    row_hint_lengths: tuple[int, ...]
+
+
+_METRIC_INDEX: _MetricIndex | None = None
+
+
+def _metric_index() -> _MetricIndex:
+    """Lookup structures over METRIC_DEFS, rebuilt whenever METRIC_DEFS is replaced."""
+    global _METRIC_INDEX
+    index = _METRIC_INDEX
+    if index is None or index.source is not METRIC_DEFS:
+        index = _METRIC_INDEX = _build_metric_index(METRIC_DEFS)
+    return index
+
+
+def _build_metric_index(metric_defs: list[dict]) -> _MetricIndex:
+    by_type: dict[str, list[dict]] = {}
+    exact: dict[tuple[str, str], list[tuple[int, dict]]] = {}
+    loose: dict[tuple[str, str], list[tuple[int, dict]]] = {}
+    row_hints: dict[str, dict[str, int]] = {}
+    for metric in metric_defs:
+        statement_type = metric["statement_type"]
+        bucket = by_type.setdefault(statement_type, [])
+        for norm_pattern in _metric_exact_patterns(metric):
+            exact.setdefault((statement_type, norm_pattern), []).append((len(bucket), metric))
+        for norm_pattern in _metric_patterns(metric):
+            loose.setdefault((statement_type, norm_pattern), []).append((len(bucket), metric))
+        bucket.append(metric)
+        for pattern in metric["patterns"]:
+            counts = row_hints.setdefault(normalize_label(pattern), {})
+            counts[statement_type] = counts.get(statement_type, 0) + 1
+    lengths = tuple(sorted({len(pattern) for pattern in row_hints if pattern}))
+    return _MetricIndex(metric_defs, by_type, exact, loose, row_hints, lengths)
+
+
+LOOSE_MATCH_SUFFIXES = frozenset({"合计", "小计", "净额", "总额", "余额"})
+LOOSE_MATCH_PREFIXES = frozenset(
+    {"其中", "其中:", "其中：", "一", "二", "三", "四", "五", "六", "七", "八", "九", "十", "加", "减"}
+)
 
 
 def _pattern_matches_label(norm_label: str, norm_pattern: str) -> bool:
@@ -1316,13 +1413,25 @@ def _pattern_matches_label(norm_label: str, norm_pattern: str) -> bool:
     # Avoid broad substring matches that collapse detailed rows into one metric.
     if norm_label.startswith(norm_pattern):
         suffix = norm_label[len(norm_pattern) :]
-        return suffix in {"合计", "小计", "净额", "总额", "余额"}
+        return suffix in LOOSE_MATCH_SUFFIXES
     if norm_label.endswith(norm_pattern):
         prefix = norm_label[: len(norm_label) - len(norm_pattern)]
-        return prefix in {"其中", "其中:", "其中：", "一", "二", "三", "四", "五", "六", "七", "八", "九", "十", "加", "减"}
+        return prefix in LOOSE_MATCH_PREFIXES
     return False
 
 
+def _loose_pattern_candidates(norm_label: str) -> list[str]:
+    """Every pattern _pattern_matches_label could accept for norm_label."""
+    candidates = [norm_label]
+    for suffix in LOOSE_MATCH_SUFFIXES:
+        if len(norm_label) > len(suffix) and norm_label.endswith(suffix):
+            candidates.append(norm_label[: -len(suffix)])
+    for prefix in LOOSE_MATCH_PREFIXES:
+        if len(norm_label) > len(prefix) and norm_label.startswith(prefix):
+            candidates.append(norm_label[len(prefix) :])
+    return candidates
+
+
 def _extract_sub_code(label: str) -> str | None:
     match = re.search(r"[\[【]\s*(\d{6})\s*[\]】]", label)
     if match:
@@ -1433,19 +1542,26 @@ def match_metric(label: str, statement_type: str) -> dict | None:
         if alias_metric:
             return alias_metric
     label_has_ratio = ("%" in label) or norm_label.endswith("率") or ("比率" in norm_label) or ("比例" in norm_label)
-    for metric in METRIC_DEFS:
-        if metric["statement_type"] != statement_type:
-            continue
-        if label_has_ratio and metric["value_nature"] != "ratio":
+    index = _metric_index()
+    # The metric earliest in dictionary order wins, whether it matched exactly or loosely.
+    best_position = -1
+    best_metric = None
+    for position, metric in index.exact.get((statement_type, norm_label), ()):
+        if not label_has_ratio or metric["value_nature"] == "ratio":
+            best_position, best_metric = position, metric
+            break
+    for candidate in _loose_pattern_candidates(norm_label):
+        entries = index.loose.get((statement_type, candidate))
+        if not entries or not _pattern_matches_label(norm_label, candidate):
             continue
-        exact_patterns = _metric_exact_patterns(metric)
-        for norm_pattern in exact_patterns:
-            if norm_label == norm_pattern:
-                return metric
-        for pattern in _metric_patterns(metric):
-            norm_pattern = normalize_label(pattern)
-            if _pattern_matches_label(norm_label, norm_pattern):
-                return metric
+        for position, metric in entries:
+            if best_metric is not None and position >= best_position:
+                break
+            if not label_has_ratio or metric["value_nature"] == "ratio":
+                best_position, best_metric = position, metric
+                break
+    if best_metric is not None:
+        return best_metric
     metric = _match_metric_from_cas2020_mapping(label, statement_type)
     if metric:
         return metric
@@ -1457,11 +1573,22 @@ def match_metric(label: str, statement_type: str) -> dict | None:
 
 def infer_statement_type_from_rows(rows) -> str | None:
     scores: dict[str, int] = {"income": 0, "balance": 0, "cashflow": 0}
+    index = _metric_index()
+    row_hints = index.row_hints
     for row in rows:
-        for metric in METRIC_DEFS:
-            for pattern in metric["patterns"]:
-                if normalize_label(pattern) in normalize_label(row.label):
-                    scores[metric["statement_type"]] += 1
+        norm_label = normalize_label(row.label)
+        # Look up every substring of each pattern length instead of testing every pattern against the label.
+        found = {""} if "" in row_hints else set()
+        for length in index.row_hint_lengths:
+            if length > len(norm_label):
+                break
+            for start in range(len(norm_label) - length + 1):
+                candidate = norm_label[start : start + length]
+                if candidate in row_hints:
+                    found.add(candidate)
+        for pattern in found:
+            for statement_type, count in row_hints[pattern].items():
+                scores[statement_type] += count
     best = max(scores, key=scores.get)
     if scores[best] == 0:
         return None
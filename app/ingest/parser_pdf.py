@@ -1,15 +1,79 @@
 from __future__ import annotations
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from pypdf import PdfReader
 
 
-def parse_pdf(path: str) -> list[dict]:
-    reader = PdfReader(path)
+# Each task opens its own reader and re-reads shared fonts, so every worker gets one contiguous page range.
+PDF_MIN_PAGES_PER_WORKER = 16
+PDF_TEXT_BACKENDS = ("pypdf", "pdfium")
+
+
+def pdf_text_backend() -> str:
+    backend = (os.getenv("PDF_TEXT_BACKEND") or "pypdf").strip().lower()
+    if backend not in PDF_TEXT_BACKENDS:
+        raise ValueError(f"Unsupported PDF_TEXT_BACKEND: {backend}")
+    return backend
+
+
+def _open_pdf(path: str, backend: str):
+    if backend == "pdfium":
+        # C-backed extraction; pypdfium2 is installed alongside MinerU.
+        import pypdfium2
+
+        return pypdfium2.PdfDocument(path)
+    return PdfReader(path)
+
+
+def _page_count(document) -> int:
+    return len(document.pages) if isinstance(document, PdfReader) else len(document)
+
+
+def _page_text(document, index: int) -> str:
+    if isinstance(document, PdfReader):
+        return document.pages[index].extract_text() or ""
+    page = document[index]
+    textpage = page.get_textpage()
+    try:
+        return textpage.get_text_range().replace("\r\n", "\n")
+    finally:
+        textpage.close()
+        page.close()
+
+
+def _extract_pages(document, start: int, stop: int) -> list[dict]:
     pages = []
-    for i, page in enumerate(reader.pages):
-        text = page.extract_text() or ""
-        text = text.strip()
+    for i in range(start, stop):
+        text = _page_text(document, i).strip()
         if text:
             pages.append({"text": text, "page": i + 1})
     return pages
+
+
+def _extract_page_range(path: str, backend: str, start: int, stop: int) -> list[dict]:
+    return _extract_pages(_open_pdf(path, backend), start, stop)
+
+
+def parse_pdf(path: str, workers: int = 1) -> list[dict]:
+    """Extract non-empty page texts in page order.
+
+    PDF_TEXT_BACKEND selects pypdf (default) or pdfium. With workers > 1, large documents are split into
+    page ranges: this process extracts the first with the reader it already opened, a process pool the
+    rest. Leave it at 1 when already running inside a worker process.
+    """
+    backend = pdf_text_backend()
+    document = _open_pdf(path, backend)
+    num_pages = _page_count(document)
+    workers = min(workers, num_pages // PDF_MIN_PAGES_PER_WORKER)
+    if workers <= 1:
+        return _extract_pages(document, 0, num_pages)
+    bounds = [num_pages * i // workers for i in range(workers + 1)]
+    rest = workers - 1
+    with ProcessPoolExecutor(max_workers=rest) as ex:
+        chunks = ex.map(_extract_page_range, [path] * rest, [backend] * rest, bounds[1:-1], bounds[2:])
+        pages = _extract_pages(document, 0, bounds[1])
+        for chunk in chunks:
+            pages.extend(chunk)
+    return pages
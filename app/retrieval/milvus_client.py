@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import threading
 from typing import Iterable
 
+import numpy as np
 from pymilvus import (
     connections,
     FieldSchema,
@@ -15,6 +17,7 @@ from app.config import get_settings
 
 
 _COLLECTION_CACHE: Collection | None = None
+_COLLECTION_LOCK = threading.Lock()
 
 
 def _connect():
@@ -23,10 +26,17 @@ def _connect():
 
 
 def get_collection() -> Collection:
-    global _COLLECTION_CACHE
     if _COLLECTION_CACHE is not None:
         return _COLLECTION_CACHE
+    # Searches run on worker threads; make sure only one of them connects and loads.
+    with _COLLECTION_LOCK:
+        if _COLLECTION_CACHE is not None:
+            return _COLLECTION_CACHE
+        return _load_collection()
+
 
+def _load_collection() -> Collection:
+    global _COLLECTION_CACHE
     settings = get_settings()
     _connect()
 
@@ -74,30 +84,70 @@ def insert_chunks(chunks: list[dict], flush: bool = True) -> None:
         collection.flush()
 
 
+def insert_chunk_columns(
+    doc_id: str,
+    source_path: str,
+    pages: list[int],
+    chunk_indices: list[int],
+    texts: list[str],
+    embeddings: np.ndarray,
+    flush: bool = True,
+) -> None:
+    """Insert one document's chunks given as parallel columns; embeddings is a float32 (n, dim) array."""
+    if not texts:
+        return
+    collection = get_collection()
+    count = len(texts)
+    data = [
+        [doc_id] * count,
+        [source_path] * count,
+        pages,
+        chunk_indices,
+        texts,
+        list(embeddings),
+    ]
+    collection.insert(data)
+    if flush:
+        collection.flush()
+
+
 def flush_collection() -> None:
     collection = get_collection()
     collection.flush()
 
 
-def search(embedding: list[float], top_n: int) -> list[dict]:
+def search(embedding: np.ndarray | list[float], top_n: int) -> list[dict]:
+    """Search by one query vector; float32 arrays from embed_texts are passed through as-is."""
+    return search_batch([embedding], top_n)[0]
+
+
+def search_batch(embeddings: np.ndarray | list, top_n: int) -> list[list[dict]]:
+    """Search several query vectors in one Milvus request; returns one hit list per vector, in order."""
+    if len(embeddings) == 0:
+        return []
     collection = get_collection()
     res = collection.search(
-        data=[embedding],
+        data=list(embeddings),
         anns_field="embedding",
         param={"metric_type": "COSINE", "params": {"ef": 64}},
         limit=top_n,
         output_fields=["doc_id", "source_path", "page", "chunk_index", "text"],
+        # Ingest flushes before marking documents indexed; skipping the freshness wait is fine for RAG reads.
+        consistency_level="Eventually",
     )
-    hits = []
-    for hit in res[0]:
-        hits.append(
-            {
-                "doc_id": hit.entity.get("doc_id"),
-                "source_path": hit.entity.get("source_path"),
-                "page": hit.entity.get("page"),
-                "chunk_index": hit.entity.get("chunk_index"),
-                "text": hit.entity.get("text"),
-                "score": float(hit.score),
-            }
-        )
-    return hits
+    results = []
+    for query_hits in res:
+        hits = []
+        for hit in query_hits:
+            hits.append(
+                {
+                    "doc_id": hit.entity.get("doc_id"),
+                    "source_path": hit.entity.get("source_path"),
+                    "page": hit.entity.get("page"),
+                    "chunk_index": hit.entity.get("chunk_index"),
+                    "text": hit.entity.get("text"),
+                    "score": float(hit.score),
+                }
+            )
+        results.append(hits)
+    return results
@@ -1,18 +1,49 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from typing import List
 
+import httpx
 from openai import OpenAI
 
 from app.config import get_settings
 
 
+@lru_cache(maxsize=1)
+def _client() -> OpenAI:
+    settings = get_settings()
+    return OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
+
+
+@lru_cache(maxsize=1)
+def _http_client() -> httpx.Client:
+    return httpx.Client(timeout=60)
+
+
+def _rerank_cross_encoder(query: str, chunks: list[dict]) -> list[dict]:
+    settings = get_settings()
+    resp = _http_client().post(settings.reranker_url, json={"query": query, "passages": [c["text"] for c in chunks]})
+    resp.raise_for_status()
+    scores = resp.json()["scores"]
+    if len(scores) != len(chunks):
+        raise RuntimeError(f"Rerank score count mismatch: {len(scores)} vs {len(chunks)}")
+    scored = []
+    for chunk, score in zip(chunks, scores):
+        chunk = dict(chunk)
+        chunk["rerank_score"] = float(score)
+        scored.append(chunk)
+    scored.sort(key=lambda c: c["rerank_score"], reverse=True)
+    return scored
+
+
 def rerank(query: str, chunks: list[dict]) -> list[dict]:
     if not chunks:
         return []
     settings = get_settings()
-    client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
+    if settings.rerank_backend == "cross_encoder":
+        return _rerank_cross_encoder(query, chunks)
+    client = _client()
 
     passages = [c["text"] for c in chunks]
     numbered = "\n".join([f"[{i}] {p}" for i, p in enumerate(passages)])
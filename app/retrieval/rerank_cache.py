@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from app.config import get_settings
+from app.retrieval.rerank import rerank
+
+
+class ScorerCache:
+    """In-process LRU of rerank scores keyed by (query, chunk); the query may carry the candidate set."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(0, max_entries)
+        self._scores: OrderedDict[tuple[str, tuple], float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, query: str, keys: list[tuple]) -> dict[tuple, float]:
+        qkey = _query_key(query)
+        found: dict[tuple, float] = {}
+        with self._lock:
+            for key in keys:
+                score = self._scores.get((qkey, key))
+                if score is None:
+                    continue
+                self._scores.move_to_end((qkey, key))
+                found[key] = score
+        return found
+
+    def put_many(self, query: str, scores: dict[tuple, float]) -> None:
+        if self.max_entries <= 0:
+            return
+        qkey = _query_key(query)
+        with self._lock:
+            for key, score in scores.items():
+                self._scores[(qkey, key)] = score
+                self._scores.move_to_end((qkey, key))
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+
+def _query_key(query: str) -> str:
+    return hashlib.sha256(query.strip().encode("utf-8")).hexdigest()
+
+
+def _chunk_key(chunk: dict) -> tuple:
+    return (chunk.get("doc_id"), chunk.get("page"), chunk.get("chunk_index"))
+
+
+@lru_cache(maxsize=1)
+def get_scorer_cache() -> ScorerCache:
+    return ScorerCache(get_settings().rerank_cache_size)
+
+
+def _score_scope(query: str, keys: list[tuple]) -> str | None:
+    # Cross-encoder scores depend only on the (query, passage) pair. LLM scores are relative to the
+    # passages ranked together, so they are only reused for the same candidate set.
+    if get_settings().rerank_backend == "cross_encoder":
+        return None
+    return query.strip() + "\0" + repr(sorted(keys, key=repr))
+
+
+def rerank_cached(query: str, chunks: list[dict]) -> list[dict]:
+    if not chunks:
+        return []
+    cache = get_scorer_cache()
+    keys = [_chunk_key(c) for c in chunks]
+    scope = _score_scope(query, keys)
+    cached = cache.get_many(scope or query, keys)
+    if scope is not None and len(cached) < len(keys):
+        cached = {}
+
+    scored: list[dict] = []
+    misses: list[dict] = []
+    for chunk, key in zip(chunks, keys):
+        if key in cached:
+            hit = dict(chunk)
+            hit["rerank_score"] = cached[key]
+            scored.append(hit)
+        else:
+            misses.append(chunk)
+
+    unscored: list[dict] = []
+    if misses:
+        fresh_scores: dict[tuple, float] = {}
+        for chunk in rerank(query, misses):
+            if "rerank_score" in chunk:
+                fresh_scores[_chunk_key(chunk)] = chunk["rerank_score"]
+                scored.append(chunk)
+            else:
+                # Reranker output could not be parsed; keep vector order for these.
+                unscored.append(chunk)
+        cache.put_many(scope or query, fresh_scores)
+
+    scored.sort(key=lambda c: c.get("rerank_score", 0), reverse=True)
+    return scored + unscored
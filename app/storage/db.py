@@ -1,16 +1,105 @@
 from __future__ import annotations
 
+import os
+import threading
+import time
 from contextlib import contextmanager
 import psycopg
+from psycopg.pq import TransactionStatus
 
 from app.config import get_settings
 
 
+# A connection idle for longer than this is probed before reuse; the server may have dropped it.
+CONN_CHECK_IDLE_SECONDS = 30.0
+
+_LOCAL = threading.local()
+
+
+def _connect() -> psycopg.Connection:
+    return psycopg.connect(get_settings().postgres_dsn)
+
+
+class _ThreadConn:
+    """A thread's cached connection; closed when the thread exits and its locals are released."""
+
+    __slots__ = ("conn", "pid", "busy", "last_used")
+
+    def __init__(self, conn: psycopg.Connection) -> None:
+        self.conn = conn
+        self.pid = os.getpid()
+        self.busy = False
+        self.last_used = time.monotonic()
+
+    def close(self) -> None:
+        # A forked child must not close the parent's socket: that would end the parent's session.
+        if self.pid == os.getpid() and not self.conn.closed:
+            self.conn.close()
+
+    def __del__(self) -> None:
+        self.close()
+
+
+def _is_alive(conn: psycopg.Connection) -> bool:
+    if conn.closed or conn.broken:
+        return False
+    # An empty query is one round trip; run it outside a transaction so the connection stays idle.
+    conn.autocommit = True
+    try:
+        conn.execute("")
+    except psycopg.OperationalError:
+        conn.close()
+        return False
+    finally:
+        if not conn.closed:
+            conn.autocommit = False
+    return True
+
+
+def _thread_conn() -> _ThreadConn:
+    held = getattr(_LOCAL, "held", None)
+    if held is not None and held.pid == os.getpid() and not held.conn.closed:
+        if time.monotonic() - held.last_used < CONN_CHECK_IDLE_SECONDS or _is_alive(held.conn):
+            return held
+    held = _LOCAL.held = _ThreadConn(_connect())
+    return held
+
+
+def close_thread_conn() -> None:
+    """Close the calling thread's cached connection, e.g. before a long-lived thread goes idle."""
+    held = getattr(_LOCAL, "held", None)
+    if held is not None:
+        _LOCAL.held = None
+        held.close()
+
+
 @contextmanager
 def get_conn():
-    settings = get_settings()
-    conn = psycopg.connect(settings.postgres_dsn)
+    """Yield this thread's reusable connection; callers commit their own work.
+
+    Whatever is left uncommitted when the block exits is rolled back, as closing the connection used to do.
+    A nested get_conn() gets a separate short-lived connection so it can't end the outer transaction.
+    """
+    held = getattr(_LOCAL, "held", None)
+    if held is not None and held.busy and held.pid == os.getpid():
+        conn = _connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    held = _thread_conn()
+    conn = held.conn
+    held.busy = True
     try:
         yield conn
     finally:
-        conn.close()
+        held.busy = False
+        held.last_used = time.monotonic()
+        if not conn.closed and conn.info.transaction_status != TransactionStatus.IDLE:
+            try:
+                conn.rollback()
+            except psycopg.Error:
+                # Broken link: drop it and reconnect on next use.
+                conn.close()
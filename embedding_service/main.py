@@ -1,18 +1,23 @@
 from __future__ import annotations
 
+import base64
 import os
+import threading
 from typing import List
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from pydantic import BaseModel
 import numpy as np
-from FlagEmbedding import BGEM3FlagModel
+import orjson
+from FlagEmbedding import BGEM3FlagModel, FlagReranker
 
 load_dotenv()
 
 MODEL_NAME = os.getenv("BGE_M3_MODEL", "BAAI/bge-m3")
 USE_FP16 = os.getenv("BGE_M3_FP16", "false").lower() == "true"
+RERANKER_MODEL_NAME = os.getenv("BGE_RERANKER_MODEL", "BAAI/bge-reranker-v2-m3")
+RERANKER_FP16 = os.getenv("BGE_RERANKER_FP16", "false").lower() == "true"
 
 app = FastAPI(title="Embedding Service")
 
@@ -35,12 +40,9 @@ class EmbeddingModel:
 
         result: dict = {}
 
+        # Vectors stay float32 arrays; orjson writes them straight to JSON without Python floats.
         if mode in ("dense", "all"):
-            dense = []
-            for v in output["dense_vecs"]:
-                v = v.astype(np.float32)
-                dense.append(v.tolist())
-            result["dense"] = dense
+            result["dense"] = np.ascontiguousarray(output["dense_vecs"], dtype=np.float32)
 
         if mode in ("sparse", "all"):
             lexical = output.get("lexical_weights") or []
@@ -55,10 +57,7 @@ class EmbeddingModel:
             result["sparse"] = sparse
 
         if mode in ("colbert", "all"):
-            colbert = []
-            for mat in output["colbert_vecs"]:
-                colbert.append(mat.astype(np.float32).tolist())
-            result["colbert"] = colbert
+            result["colbert"] = [np.ascontiguousarray(mat, dtype=np.float32) for mat in output["colbert_vecs"]]
 
         return result
 
@@ -69,6 +68,10 @@ model = EmbeddingModel(MODEL_NAME, use_fp16=USE_FP16)
 class EmbedRequest(BaseModel):
     texts: List[str]
     mode: str | None = "dense"
+    # Dense-only callers can skip "result", which repeats the vectors.
+    include_result: bool = True
+    # "b64" sends dense vectors as base64 of row-major float32 bytes in "vectors_b64" instead of "vectors".
+    format: str = "json"
 
 
 @app.post("/embed")
@@ -76,7 +79,43 @@ def embed(req: EmbedRequest):
     result = model.encode(req.texts, mode=req.mode or "dense")
     # Keep backward compatibility with previous API: return vectors for dense mode
     dense = result.get("dense", [])
-    return {"vectors": dense, "dim": len(dense[0]) if dense else 0, "result": result}
+    dim = len(dense[0]) if len(dense) else 0
+    if req.format == "b64":
+        packed = np.ascontiguousarray(dense, dtype=np.float32).tobytes()
+        payload = {"vectors_b64": base64.b64encode(packed).decode("ascii"), "dim": dim}
+    else:
+        payload = {"vectors": dense, "dim": dim}
+    if req.include_result:
+        payload["result"] = result
+    return Response(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY), media_type="application/json")
+
+
+_RERANKER: FlagReranker | None = None
+_RERANKER_LOCK = threading.Lock()
+
+
+def _get_reranker() -> FlagReranker:
+    # Loaded on first /rerank so embedding-only deployments don't hold a second model.
+    global _RERANKER
+    with _RERANKER_LOCK:
+        if _RERANKER is None:
+            _RERANKER = FlagReranker(RERANKER_MODEL_NAME, use_fp16=RERANKER_FP16)
+        return _RERANKER
+
+
+class RerankRequest(BaseModel):
+    query: str
+    passages: List[str]
+
+
+@app.post("/rerank")
+def rerank(req: RerankRequest):
+    scores: list[float] = []
+    if req.passages:
+        # One batched forward pass over every (query, passage) pair.
+        raw = _get_reranker().compute_score([[req.query, passage] for passage in req.passages])
+        scores = [float(score) for score in np.atleast_1d(raw)]
+    return Response(orjson.dumps({"scores": scores}), media_type="application/json")
 
 
 @app.get("/health")
@@ -13,7 +13,7 @@ ELR_CODE_RE = re.compile(r"\[(\d+[a-z]?)\]")
 
 
 def _clean(text: str) -> str:
-    return re.sub(r"\s+", " ", text.replace("\n", " ").replace("\r", " ")).strip()
+    return " ".join(text.split())
 
 
 def _extract_table_rows(table) -> list[list[str]]:
@@ -13,7 +13,7 @@ SUB_RE = re.compile(r"^\[(\d{6})\]\s*(.+)$")
 
 
 def _clean(text: str) -> str:
-    return re.sub(r"\s+", " ", text.replace("\n", " ").replace("\r", " ")).strip()
+    return " ".join(text.split())
 
 
 def _normalize_sub_name(name: str) -> str:
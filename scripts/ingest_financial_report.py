@@ -490,12 +490,15 @@ def insert_report(
     allow_existing: bool = False,
     write_pages: bool = False,
     engine: str | None = None,
+    pdf_workers: int = 1,
 ) -> int:
     source_hash = sha256_file(path)
     now = datetime.utcnow()
 
     try:
-        pages, meta, tables, parse_method = extract_financial_report(str(path), engine=engine)
+        pages, meta, tables, parse_method = extract_financial_report(
+            str(path), engine=engine, source_hash=source_hash, pdf_workers=pdf_workers
+        )
     except Exception as exc:
         _record_error(path, None, None, "parse", exc)
         raise
@@ -1036,6 +1039,12 @@ def main() -> None:
         help="Write or update report_pages when appending candidates for an existing report.",
     )
     parser.add_argument("--engine", choices=["auto", "pypdf", "mineru"], default="auto", help="Select parser engine.")
+    parser.add_argument(
+        "--pdf-workers",
+        type=int,
+        default=1,
+        help="Processes for pypdf text extraction of large reports (e.g. the CPU count).",
+    )
     args = parser.parse_args()
 
     path = Path(args.path)
@@ -1050,6 +1059,7 @@ def main() -> None:
         allow_existing=args.allow_existing,
         write_pages=args.write_pages,
         engine=None if args.engine == "auto" else args.engine,
+        pdf_workers=max(1, args.pdf_workers),
     )
     print(f"report_id={report_id}")
 
@@ -0,0 +1,126 @@
+import re
+
+import pytest
+
+pytest.importorskip("tiktoken")
+
+from app.chunking import utils  # noqa: E402
+from app.chunking.index import DEFAULT_SEPARATORS  # noqa: E402
+from app.chunking.recursive import split_recursive  # noqa: E402
+
+
+class FakeEncoder:
+    """Offline stand-in for cl100k_base with the same byte-level shape.
+
+    ASCII words and digit runs are one token each. Other characters become a two-byte token plus the
+    remaining bytes, the way BPE splits most CJK characters.
+    """
+
+    TOKEN_RE = re.compile(r" ?[A-Za-z]+| ?\d+|\s+|.", re.DOTALL)
+
+    def encode(self, text: str) -> list[bytes]:
+        tokens: list[bytes] = []
+        for match in self.TOKEN_RE.finditer(text):
+            raw = match.group().encode("utf-8")
+            if len(raw) > 2 and not match.group().isascii():
+                tokens.extend((raw[:2], raw[2:]))
+            else:
+                tokens.append(raw)
+        return tokens
+
+    def encode_batch(self, texts: list[str], num_threads: int = 1) -> list[list[bytes]]:
+        return [self.encode(text) for text in texts]
+
+    def decode_bytes_batch(self, batch: list[list[bytes]]) -> list[bytes]:
+        return [b"".join(tokens) for tokens in batch]
+
+
+@pytest.fixture(autouse=True)
+def fake_encoder(monkeypatch):
+    monkeypatch.setattr(utils, "get_encoder", FakeEncoder)
+
+
+def test_apply_overlap_prefixes_token_tail_of_english_chunk():
+    chunks = ["alpha beta gamma delta", "epsilon", "zeta eta"]
+    # The tail comes from the previous source chunk, not from its already-prefixed form.
+    assert utils.apply_overlap(chunks, 2) == [
+        "alpha beta gamma delta",
+        " gamma deltaepsilon",
+        "epsilonzeta eta",
+    ]
+
+
+def test_apply_overlap_counts_tokens_not_characters_for_cjk():
+    # Four tokens are the last two characters here; a character slice would take four.
+    assert utils.apply_overlap(["财务报表附注", "现金流量"], 4) == ["财务报表附注", "附注现金流量"]
+
+
+def test_apply_overlap_drops_partial_character_at_tail_start():
+    # Three tokens start inside "附"; its stray bytes are dropped rather than decoded as garbage.
+    assert utils.apply_overlap(["财务报表附注", "现金流量"], 3) == ["财务报表附注", "注现金流量"]
+
+
+def test_apply_overlap_without_overlap_or_with_single_chunk_is_unchanged():
+    chunks = ["alpha beta", "gamma"]
+    assert utils.apply_overlap(chunks, 0) == chunks
+    assert utils.apply_overlap(["财务报表附注"], 4) == ["财务报表附注"]
+
+
+RECURSIVE_TEXT = (
+    "Revenue grew in 2024. Margins held.\n\n"
+    "Line one has several plain words in it\nLine two is short\n"
+    "资产负债表显示总资产增加。利润表显示净利润增长。\n\n"
+    "A1B2C3D4E5F6G7H8I9J0K1L2"
+)
+
+
+def test_split_recursive_matches_fixed_chunks():
+    # Oversized paragraphs fall through "\n", "。", ". " and " " in turn; text with no separator left
+    # ends in the character-sliced hard split.
+    chunks = split_recursive(RECURSIVE_TEXT, 6, 0, DEFAULT_SEPARATORS)
+    assert chunks == [
+        "Revenue grew in 2024",
+        "Margins held.",
+        "Line one has several plain words",
+        "in it",
+        "Line two is short",
+        "资产负债表显",
+        "示总资产增加",
+        "利润表显示净",
+        "利润增长",
+        "A1B2C3",
+        "D4E5F6",
+        "G7H8I9",
+        "J0K1L2",
+    ]
+    assert split_recursive(RECURSIVE_TEXT, 10, 0, DEFAULT_SEPARATORS) == [
+        "Revenue grew in 2024. Margins held.",
+        "Line one has several plain words in it",
+        "Line two is short",
+        "资产负债表显示总资产",
+        "增加",
+        "利润表显示净利润增长",
+        "A1B2C3D4E5",
+        "F6G7H8I9J0",
+        "K1L2",
+    ]
+
+
+def test_split_recursive_respects_max_tokens_and_source_order():
+    chunks = split_recursive(RECURSIVE_TEXT, 6, 0, DEFAULT_SEPARATORS)
+    # The hard split slices characters, so only CJK slices may exceed the budget.
+    assert all(utils.count_tokens(chunk) <= 6 for chunk in chunks if chunk.isascii())
+    # "Line one has several plain words" is 6 tokens joined but 11 summed part by part.
+    assert utils.count_tokens("Line one has several plain words") == 6
+    strip = re.compile(r"[\s。.]")
+    assert strip.sub("", "".join(chunks)) == strip.sub("", RECURSIVE_TEXT)
+
+
+def test_split_sentence_counts_joined_sentences():
+    from app.chunking.sentence import split_sentence
+
+    # Joined, the first two sentences are 7 tokens; summed with the joining space they would be 8.
+    assert split_sentence("Sales rose. Costs fell sharply. Cash improved.", 7, 0) == [
+        "Sales rose. Costs fell sharply.",
+        "Cash improved.",
+    ]
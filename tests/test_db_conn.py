@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+from psycopg.pq import TransactionStatus  # noqa: E402
+
+from app.storage import db  # noqa: E402
+
+
+class FakeConn:
+    def __init__(self) -> None:
+        self.closed = False
+        self.broken = False
+        self.autocommit = False
+        self.rollbacks = 0
+        self.probe_error: Exception | None = None
+        self.status = TransactionStatus.IDLE
+
+    @property
+    def info(self):
+        return self
+
+    @property
+    def transaction_status(self):
+        return self.status
+
+    def execute(self, query: str) -> None:
+        if self.probe_error is not None:
+            raise self.probe_error
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+        self.status = TransactionStatus.IDLE
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    conns: list[FakeConn] = []
+
+    def fake_connect() -> FakeConn:
+        conns.append(FakeConn())
+        return conns[-1]
+
+    monkeypatch.setattr(db, "_connect", fake_connect)
+    monkeypatch.setattr(db, "_LOCAL", threading.local())
+    return conns
+
+
+def test_get_conn_reuses_thread_connection_and_rolls_back(opened):
+    with db.get_conn() as conn:
+        conn.status = TransactionStatus.INTRANS
+        with db.get_conn() as nested:
+            assert nested is not conn
+        assert nested.closed
+        assert conn.rollbacks == 0
+    assert conn.rollbacks == 1
+    assert not conn.closed
+
+    with db.get_conn() as again:
+        assert again is conn
+    assert conn.rollbacks == 1
+    assert len(opened) == 2
+
+
+def test_get_conn_replaces_idle_connection_that_fails_probe(opened, monkeypatch):
+    monkeypatch.setattr(db, "CONN_CHECK_IDLE_SECONDS", 0.0)
+    with db.get_conn() as first:
+        pass
+    with db.get_conn() as second:
+        assert second is first
+    assert not first.autocommit
+
+    first.probe_error = psycopg.OperationalError("server closed the connection")
+    with db.get_conn() as third:
+        assert third is not first
+    assert first.closed
+
+
+def test_thread_connection_closed_when_thread_exits(opened):
+    def work() -> None:
+        with db.get_conn():
+            pass
+
+    worker = threading.Thread(target=work)
+    worker.start()
+    worker.join()
+    assert len(opened) == 1
+    assert opened[0].closed
@@ -0,0 +1,24 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("numpy")
+
+from app.ingest import embedding_client  # noqa: E402
+
+
+def test_async_client_is_per_loop_and_closed_at_shutdown(monkeypatch):
+    monkeypatch.setattr(embedding_client, "get_settings", lambda: SimpleNamespace(embedding_concurrency=2))
+
+    async def checkout():
+        client = embedding_client._get_async_client()
+        assert embedding_client._get_async_client() is client
+        return client
+
+    first = asyncio.run(checkout())
+    second = asyncio.run(checkout())
+    assert second is not first
+    assert first.is_closed and second.is_closed
+    assert len(embedding_client._ASYNC_CLIENTS) == 0
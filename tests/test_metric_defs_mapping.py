@@ -101,3 +101,32 @@ def test_match_metric_cas_mapping_unmapped_falls_back_to_cas_code(monkeypatch):
     assert matched is not None
     assert matched["metric_code"] == "cas2020_837460"
     assert matched["value_nature"] == "stock"
+
+
+def test_infer_statement_type_counts_pattern_substrings(monkeypatch):
+    revenue = _metric("revenue", "income")
+    revenue["patterns"] = ["营业收入", "收入"]
+    cash = _metric("cash", "balance")
+    cash["patterns"] = ["货币资金"]
+    monkeypatch.setattr(md, "METRIC_DEFS", [revenue, cash])
+
+    class Row:
+        def __init__(self, label: str) -> None:
+            self.label = label
+
+    rows = [Row("一、营业收入合计"), Row("货币资金"), Row("其他")]
+    assert md.infer_statement_type_from_rows(rows) == "income"
+    assert md.infer_statement_type_from_rows([Row("其他")]) is None
+
+
+def test_match_metric_prefers_earliest_metric_across_loose_and_exact(monkeypatch):
+    total = _metric("total_revenue", "income")
+    total["patterns"] = ["营业收入"]
+    other = _metric("other_revenue", "income")
+    other["patterns_exact"] = ["营业收入合计"]
+    monkeypatch.setattr(md, "METRIC_DEFS", [total, other])
+    monkeypatch.setattr(md, "CAS2020_MAPPING", {})
+
+    assert md.match_metric("营业收入合计", "income") is total
+    assert md.match_metric("其中：营业收入", "income") is total
+    assert md.match_metric("营业收入明细", "income") is None
@@ -2,8 +2,12 @@ from __future__ import annotations
 
 import json
 import subprocess
+import sys
 from pathlib import Path
 
+import pytest
+
+from app.ingest import financial_report as fr
 from app.ingest.financial_report import _mineru_extract
 
 
@@ -61,3 +65,64 @@ def test_mineru_extract_returns_none_when_no_artifacts(tmp_path, monkeypatch) ->
 
     pages = _mineru_extract(pdf_path)
     assert pages is None
+
+
+def test_mineru_extract_reuses_server_worker(tmp_path, monkeypatch) -> None:
+    worker_script = tmp_path / "worker.py"
+    worker_script.write_text(
+        "import json, os, pathlib, sys\n"
+        "for line in sys.stdin:\n"
+        "    req = json.loads(line)\n"
+        "    stem = pathlib.Path(req['input']).stem\n"
+        "    out = pathlib.Path(req['output']) / stem / 'auto'\n"
+        "    out.mkdir(parents=True, exist_ok=True)\n"
+        "    payload = [{'page_idx': 0, 'type': 'text', 'text': f'pid {os.getpid()}'}]\n"
+        "    (out / f'{stem}_content_list.json').write_text(json.dumps(payload))\n"
+        "    print('loading models...')\n"
+        "    print(json.dumps({'ok': True}), flush=True)\n",
+        encoding="utf-8",
+    )
+    monkeypatch.delenv("MINERU_CMD", raising=False)
+    monkeypatch.delenv("MINERU_OUTPUT_DIR", raising=False)
+    monkeypatch.setenv("MINERU_SERVER_CMD", f"{sys.executable} {worker_script}")
+
+    def _fail_run(*args, **kwargs):
+        raise AssertionError("subprocess.run should not be used with MINERU_SERVER_CMD")
+
+    monkeypatch.setattr(subprocess, "run", _fail_run)
+
+    texts = []
+    try:
+        for name in ("first", "second"):
+            pdf_path = tmp_path / f"{name}.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4\n%mock")
+            pages = _mineru_extract(pdf_path)
+            assert pages is not None
+            texts.append(pages[0].text_md)
+    finally:
+        fr._close_mineru_workers()
+    assert texts[0].startswith("pid ")
+    assert texts[0] == texts[1]
+
+
+def test_mineru_worker_restarts_after_reply_timeout(tmp_path) -> None:
+    worker_script = tmp_path / "worker.py"
+    worker_script.write_text(
+        "import json, os, sys\n"
+        "marker = sys.argv[1]\n"
+        "for line in sys.stdin:\n"
+        "    if not os.path.exists(marker):\n"
+        "        open(marker, 'w').close()\n"
+        "        print('stuck', flush=True)\n"
+        "        continue\n"
+        "    print(json.dumps({'ok': True}), flush=True)\n",
+        encoding="utf-8",
+    )
+    worker = fr.MineruWorker(f"{sys.executable} {worker_script} {tmp_path / 'hung'}", reply_timeout=0.5)
+    try:
+        with pytest.raises(subprocess.TimeoutExpired):
+            worker.extract(tmp_path / "a.pdf", tmp_path)
+        assert worker._proc is None
+        worker.extract(tmp_path / "b.pdf", tmp_path)
+    finally:
+        worker.close()
@@ -26,6 +26,22 @@ def test_strip_numbers_removes_numeric_tokens() -> None:
     assert _strip_numbers(line) == "Operating Income"
 
 
+def test_tokenize_page_matches_strip_and_extract_per_line() -> None:
+    text = "Net  income (1,234)  2024 5.5\n\n  Revenue 1,000 -3\r\nNo numbers here  "
+    tokens = fr._tokenize_page(text)
+    lines = [line.strip() for line in text.splitlines()]
+    assert [line for line, _, _ in tokens] == lines
+    assert [cells for _, _, cells in tokens] == [_extract_numbers(line) for line in lines]
+    # Numberless lines are never rows, so their label is not computed.
+    assert [label for _, label, _ in tokens] == [
+        _strip_numbers(line) if _extract_numbers(line) else "" for line in lines
+    ]
+
+
+def test_html_cell_text_collapses_breaks_and_whitespace() -> None:
+    assert fr._html_cell_text("<td>Total<br/>  assets&nbsp; <b>2024</b></td>") == "Total assets 2024"
+
+
 def test_detect_units_usd() -> None:
     currency, units = _detect_units("Amounts in USD")
     assert currency == "USD"
@@ -55,6 +71,17 @@ def test_detect_statement_type_from_elr_code(monkeypatch) -> None:
     assert fr._detect_statement_type("ELR [230005a]") == "balance_sheet"
 
 
+def test_detect_statement_type_keyword_priority(monkeypatch) -> None:
+    monkeypatch.setattr(fr, "ELR_STATEMENT_MAP", {"230005a": "balance_sheet"})
+    # Earlier STATEMENT_KEYWORDS entries win regardless of position; keywords beat ELR codes.
+    assert fr._detect_statement_type("Cash Flow notes, see BALANCE SHEET") == "balance_sheet"
+    assert fr._detect_statement_type("[230005a] 合并利润表") == "income_statement"
+    # Overlapping keywords: the later-starting, higher-priority one must still be seen.
+    assert fr._detect_statement_type("income statement of financial position") == "balance_sheet"
+    monkeypatch.setattr(fr, "ELR_STATEMENT_MAP", {"230005a": "cash_flow"})
+    assert fr._detect_statement_type("ELR [230005A]") == "cash_flow"
+
+
 def test_mineru_content_list_unknown_type_filtered(monkeypatch, tmp_path) -> None:
     monkeypatch.setattr(fr, "KNOWN_ELEMENT_TYPES", {"text", "table"})
     content_path = tmp_path / "content.json"
@@ -74,3 +101,20 @@ def test_build_mineru_env_uses_tmp_cache() -> None:
     assert env["HUGGINGFACE_HUB_CACHE"] == "/tmp"
     assert env["TRANSFORMERS_CACHE"] == "/tmp"
     assert env["MPLCONFIGDIR"] == "/tmp/mplconfig"
+
+
+def test_extract_financial_report_reuses_parse_cache(monkeypatch, tmp_path) -> None:
+    pdf_path = tmp_path / "report.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 fake")
+    calls: list[str | None] = []
+
+    def fake_extract(path, engine=None, pdf_workers=1):
+        calls.append(engine)
+        return [fr.PageContent(page=1, text_raw="2024年年度报告", text_md="2024年年度报告")], "pypdf"
+
+    monkeypatch.setenv("REPORT_PARSE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(fr, "extract_pdf_to_markdown", fake_extract)
+    first = fr.extract_financial_report(str(pdf_path), engine="pypdf")
+    second = fr.extract_financial_report(str(pdf_path), engine="pypdf")
+    assert calls == ["pypdf"]
+    assert second == first
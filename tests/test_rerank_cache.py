@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("openai")
+
+from app.retrieval import rerank_cache  # noqa: E402
+
+
+def _chunk(idx: int) -> dict:
+    return {"doc_id": "d", "page": 1, "chunk_index": idx, "text": f"passage {idx}"}
+
+
+@pytest.mark.parametrize(("backend", "expected_calls"), [("llm", [[0, 1], [0, 2]]), ("cross_encoder", [[0, 1], [2]])])
+def test_rerank_cached_reuses_scores_per_backend(monkeypatch, backend, expected_calls):
+    calls: list[list[int]] = []
+
+    def fake_rerank(query, chunks):
+        calls.append([c["chunk_index"] for c in chunks])
+        return [dict(c, rerank_score=float(len(chunks) - i)) for i, c in enumerate(chunks)]
+
+    monkeypatch.setattr(rerank_cache, "rerank", fake_rerank)
+    monkeypatch.setattr(rerank_cache, "get_settings", lambda: SimpleNamespace(rerank_backend=backend))
+    cache = rerank_cache.ScorerCache(16)
+    monkeypatch.setattr(rerank_cache, "get_scorer_cache", lambda: cache)
+
+    rerank_cache.rerank_cached("q", [_chunk(0), _chunk(1)])
+    rerank_cache.rerank_cached("q", [_chunk(1), _chunk(0)])
+    rerank_cache.rerank_cached("q", [_chunk(0), _chunk(2)])
+    assert calls == expected_calls
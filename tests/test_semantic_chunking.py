@@ -0,0 +1,43 @@
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("httpx")
+pytest.importorskip("tiktoken")
+
+from app.chunking import semantic  # noqa: E402
+
+
+def _unit(degrees: float) -> list[float]:
+    return [math.cos(math.radians(degrees)), math.sin(math.radians(degrees))]
+
+
+@pytest.fixture
+def stub_embeddings(monkeypatch):
+    vectors: dict[str, list[float]] = {}
+    monkeypatch.setattr(semantic, "embed_texts", lambda sentences: [vectors[s] for s in sentences])
+    monkeypatch.setattr(semantic, "count_tokens", lambda text: len(text.split()))
+    return vectors
+
+
+def test_split_semantic_boundaries_follow_halving_average(stub_embeddings):
+    # With a plain mean of all five vectors, "Debt fell." (30°) drops below 0.9 and starts a new chunk;
+    # the chunk vector halves toward each merged sentence, so it stays in one chunk.
+    sentences = ["Revenue grew.", "Sales rose.", "Margins held.", "Debt fell.", "Cash improved."]
+    stub_embeddings.update(zip(sentences, map(_unit, [60, 60, 50, 30, 40])))
+    assert semantic.split_semantic(" ".join(sentences), 100, 0, sim_threshold=0.9) == [" ".join(sentences)]
+
+
+def test_split_semantic_breaks_on_topic_change_and_token_budget(stub_embeddings):
+    sentences = ["Revenue grew strongly.", "Sales rose.", "The board met.", "Directors voted.", "Audit began."]
+    stub_embeddings.update(zip(sentences, map(_unit, [0, 10, 80, 85, 90])))
+    assert semantic.split_semantic(" ".join(sentences), 100, 0, sim_threshold=0.9) == [
+        "Revenue grew strongly. Sales rose.",
+        "The board met. Directors voted. Audit began.",
+    ]
+    assert semantic.split_semantic(" ".join(sentences), 5, 0, sim_threshold=0.9) == [
+        "Revenue grew strongly. Sales rose.",
+        "The board met. Directors voted.",
+        "Audit began.",
+    ]